@@ -14,316 +14,172 @@
 # - Dash is a python framework created by plotly for creating interactive web applications. It has two building blocks, layout (consisting of HTML components and Core Components) and callbacks
 # - Plotly is a graphing library that is used to make interactive and publication-quality graphs
 
+# This module only builds what the layout and the callbacks of the dashboard need, so that it can be imported quickly by the
+# server. The exploratory analysis of the dataset lives in report.py.
+
 # ### Importing the Python Libraries
 
 # In[1]:
 
 
+import inspect
+import os
+
 import dash
 from dash import dcc
 from dash import html
-from dash.dependencies import Input, Output
+from dash import ctx, no_update
+from dash.dependencies import Input, Output, State
+import numpy as np
 import plotly.express as px
 import plotly.graph_objs as go
-import pandas as pd
-import numpy as np
-import seaborn as sns
 
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
 
-# Here we have installed all the libraries which will be required in the creation of our dashboard
+import background_jobs
+import bitmaps
+import dataset
+import metrics
+import spatial
+from figure_cache import FigureCache
 
-# ### Loading the dataset and understanding it
+
+# ### Loading the dataset
 
 # I have used a kaggle dataset for creating this dashboard. The link for the same is as follows:
 # 
 # https://www.kaggle.com/shrutimehta/zomato-restaurants-data?select=zomato.csv
 
-# In[2]:
-
-
-#file = "zomato.csv"
-file = "zomato.csv"
-df = pd.read_csv(file, encoding = "ISO-8859-1")
-#Encoding attribute is mentioned here as certain characters could not be read by the default encoding mechnaism
-
-
-# In[3]:
-
-
-df.head()
-
-
-# In[4]:
-
-
-df.info()
-
-
-# As we can see, our dataset has 21 different columns. These columns contain all the information about the restraunts which are available on the Zomato app along with their locations, ratings, average cost, availability of delivery, Rating color (denoting number of stars) etc.
-
-# In[5]:
-
-
-df.describe()
-
-
-# The Kaggle dataset also had a Excel file containing the various countries along with their contry codes. That file has been loaded into our Jupyter notebook as well, as follows:
-
-# In[6]:
-
-
-#contry_code_df = pd.read_excel("C:\\Users\\Meghna\\Desktop\\Zomato Dashboard\\Country-Code.xlsx")
-contry_code_df = pd.read_excel("Country-Code.xlsx")
-
-
-# In[7]:
-
-
-contry_code_df
-
-
-# Now, I will merge the df and country_code_df datasets, using the Country Code column so that we can better identify what country is a particular restaurant located in.
-
-# In[8]:
-
-
-#Merging both the datasets and removing the Country Code column
-zomato_dataset = pd.merge(df,contry_code_df,on='Country Code',how='left')
-zomato_dataset.head()
-
-
-# In[9]:
-
-
-#Deleting the Country code column from the zomato dataset
-zomato_dataset.drop(columns='Country Code', axis=1, inplace= True)
-
-
-# In[10]:
-
-
-zomato_dataset.head()
-
-
-# In[11]:
-
-
-zomato_dataset.shape
-
-
-# Now, our final dataset has 9551 rows and 21 columns
-
-# In[12]:
-
-
-#sns.heatmap(zomato_dataset.corr(),annot=True)
-
-
-# ### Handling Missing Values
-
-# Let us try to find out wether there are any missing values in the dataset or not, and if there are, we will try to handle them correctly.
-
-# In[13]:
-
-
-#import missingno as msn
-#msn.bar(zomato_dataset)
-
-
-# In[14]:
-
-
-zomato_dataset.isnull().sum()
-
-
-# As we can see that the Cuisines column has 9 missing values. Let us see how we can handle these NULL values.
-
-# In[15]:
-
-
-zomato_dataset['Cuisines'].value_counts()
-
-
-# In[16]:
-
-
-zomato_dataset['Cuisines'].value_counts().count()
-
-
-# There are 1825 distinct values in the Cuisines column. So, in order to handle the missing values in the column, we'll replace the NULL values with "Other" to depict that these retaurants serve a different type of cuisine than these 1825 values.
-
-# In[17]:
-
-
-zomato_dataset['Cuisines'].fillna("Other", inplace=True)
-
-
-# In[18]:
-
-
-zomato_dataset['Cuisines'].isnull().sum()
-
-
-# As we can see, there are no more NULL values in the Cuisines column of the dataset.
+# The Kaggle dataset also had a Excel file containing the various countries along with their contry codes. Both the files
+# are loaded and merged by the dataset module, using the Country Code column so that we can better identify what country is
+# a particular restaurant located in. The missing Cuisines are replaced by "Other" to depict that these retaurants serve a
+# different type of cuisine than the rest.
 # 
-# Now, let us see what restaurants have "Other" as the cuisine that is served there:
-
-# In[19]:
-
-
-zomato_dataset[zomato_dataset['Cuisines']=="Other"]
-
-
-# ### Analysing and Visualizing the dataset
-
-# Let's see the different countries from which restaurants are listed on Zomato
-
-# In[20]:
-
-
-country_wise_df = (zomato_dataset['Country'].value_counts())
-country_wise_df
-
-
-# As we can clearly see, the majority of restaurants listed on Zomato are from India, which makes sense as Zomato is a company that has its home-base in India itself. It has only recently started expanding to other countries.
+# Parsing these files is slow, so the cleaned and merged dataset is cached in a Feather file which is read back directly on
+# the next start, as long as the files have not changed.
 # 
-# Let's visulaize this data clearly using a pie-chart
-
-# In[21]:
-
-
-pie_country_wise = px.pie(country_wise_df, values=country_wise_df.values, names=country_wise_df.index, color_discrete_sequence=px.colors.sequential.Reds_r)
-pie_country_wise.update_traces(textposition='inside')
-pie_country_wise.update_layout(uniformtext_minsize=12, uniformtext_mode='hide')
-pie_country_wise.update_layout(title_text="Zomato's Presence around the World", title_x=0.5)
-
-
-# In[22]:
-
-
-zomato_dataset['Rating color'].value_counts()
-
-
-# In[23]:
-
-
-country_df = zomato_dataset[zomato_dataset['Country']=='India']
-rating_df = country_df[country_df['Rating color']=='Orange']
-rating_wise_city_df = rating_df['City'].value_counts()
-pie_rating_wise = px.pie(rating_wise_city_df, values=rating_wise_city_df.values, names=rating_wise_city_df.index, color_discrete_sequence=px.colors.sequential.Reds_r, hole=0.6)
-pie_rating_wise.update_traces(textposition='inside')
-pie_rating_wise.update_layout(uniformtext_minsize=12, uniformtext_mode='hide')
-pie_rating_wise.update_layout(title_text="Country wise % of restaurants having selected number of stars", title_x=0.5)
-pie_rating_wise
-
-
-# Now lets take a look at the cities in India from where maximum number of restaurants are listed on Zomato
-
-# In[24]:
-
-
-country_wise_df = zomato_dataset[zomato_dataset['Country']=='India']
-city_count = (country_wise_df['City'].value_counts())
-city_count
-
-
-# In[25]:
-
-
-country_wise_df = zomato_dataset[zomato_dataset['Country']=='India']
-city_count = (country_wise_df['City'].value_counts())
-fig = px.bar(city_count, x=city_count.index, y=city_count.values,labels={'x': "Cities","y": "Number of Restaurants"},color_discrete_sequence=px.colors.qualitative.Set1)
-fig.update_layout(plot_bgcolor="#f4f4f2")
-#fig.update_yaxes(range=[10,20])
-fig.update_layout(title_text='Cities in India listed on Zomato', title_x=0.5)
-
-
-# Clearly, most of the restaurants listed on Zomato are located in New Delhi and least are in Mohali and Panchkula
-
-# Lets take a look at how many of these restaurants in each city of India have online delivery services
-
-# In[26]:
-
-
-fig2=px.histogram(country_wise_df, x=country_wise_df['City'], color="Has Online delivery",barmode='group',
-                      color_discrete_sequence=px.colors.sequential.Reds_r)
-fig2.update_layout(plot_bgcolor="#f4f4f2")
-fig2.update_layout(title_text='Restraunts having online delivery service', title_x=0.5)
-
-
-# As expected, New Delhi has the maximum number of restaurants offering online delivery service via Zomato
+# The dataset is read through the current snapshot (dataset.current()), which also holds the counts and row ranges described
+# below. Setting ZOMATO_RELOAD_INTERVAL to a number of seconds watches the files in the background, and a new snapshot
+# is published as soon as restaurants are added or changed, without restarting the server. Every callback takes the current
+# snapshot once and passes it to the functions it calls, so all the parts of a response come from the same snapshot even when
+# a new one is published meanwhile.
+# 
+# For csv files too large to be loaded at once, setting ZOMATO_STREAM_CHUNKSIZE to a number of restaurants streams the file
+# in chunks of that size, keeping only the counts and the few columns which the scatter plot needs.
 
-# Now let's take a look at how does the rating of a restaurant vary with it's average cost for two and wether a higher cost affects rating or not
+# In[2]:
 
-# In[27]:
 
+stream_chunksize = int(os.environ.get('ZOMATO_STREAM_CHUNKSIZE', 0)) or None
+dataset.load_snapshot(chunksize=stream_chunksize)
 
-city_wise_df = zomato_dataset[zomato_dataset['City']=='New Delhi']
-fig = px.scatter(city_wise_df, x="Average Cost for two", y="Aggregate rating",color="Average Cost for two",
-                 color_continuous_scale=px.colors.sequential.Reds_r,hover_data=["Restaurant Name"])
-fig.update_layout(plot_bgcolor="#f4f4f2")
-fig.update_layout(title_text='Cost for Two vs. Rating', title_x=0.5)
-fig.show()
 
+# ### Precomputing the aggregates used by the Dashboard
 
-# Now, lets take a look at the rating of the restaurants in India. Let's see in which city are majority of the 5 star rating restaurants located using a donut graph.
+# Every chart and card in the dashboard only needs the number of restaurants grouped by a few columns. Instead of filtering
+# the complete dataset on every request, the restaurants are counted once when the snapshot is built (see dataset.COUNTS) and
+# the callbacks simply look the counts up. The snapshot also holds the row ranges of every country and city, so that their
+# restaurants can be selected without filtering the whole dataset, and the cities of every country.
 
-# The Rating color column in the dataset represents the stars of the restaurant. The order is as follows:
-# - Dark Green: 5 stars
-# - Green: 4 stars
-# - Yellow: 3 stars
-# - Orange: 2 stars
-# - Red: 1 star
-# - White: No Rating
+# In[3]:
 
-# In[28]:
 
+#Returns the counts stored under the given key, with the key levels dropped
+#If nothing has been counted for the key (for eg. when a dropdown is cleared) an empty series is returned
+def lookup_counts(counts, *key):
+    with metrics.phase('aggregate'):
+        try:
+            return counts.loc[key if len(key) > 1 else key[0]]
+        except (KeyError, TypeError):
+            return counts.iloc[:0].droplevel(list(range(len(key))))
 
-country_df['Rating color'].value_counts()
 
+#Returns the counts of the restaurants having from lo to hi stars, where stars is the (lo, hi) range selected in the slider,
+#summed by the given level. The stars are compared as integers, so the whole range is selected at once
+def sum_star_range(counts, stars, by):
+    with metrics.phase('aggregate'):
+        lo, hi = stars
+        values = counts.index.get_level_values('Stars')
+        return counts[(values >= lo) & (values <= hi)].groupby(level=by).sum()
 
-# In[29]:
 
+# ### Creating the Dashboard using Dash and Plotly
 
-rating_df = country_df[country_df['Rating color']=='Dark Green']
-rating_wise_city_df = rating_df['City'].value_counts()
-pie_rating_wise = px.pie(rating_wise_city_df, values=rating_wise_city_df.values, names=rating_wise_city_df.index, 
-                             color_discrete_sequence=px.colors.sequential.Reds_r, hole=0.6)
-pie_rating_wise.update_traces(textposition='inside')
-pie_rating_wise.update_layout(uniformtext_minsize=12, uniformtext_mode='hide')
-pie_rating_wise.update_layout(title_text="% of restaurants having selected number of ★", title_x=0.5)
+# The first thing that we have to do is initialize the Dash app as follows:
 
+# In[4]:
 
-# Naturally, most of them are in New Delhi.
 
-# Now, lets see in which country are the majority of restaurants having 5 star rating located on the world map.
+#The heavy figures (the world map and the scatter plot) can be built in background processes when
+#ZOMATO_BACKGROUND_CALLBACKS=1 is set and diskcache is installed, so that they do not hold up a worker thread of the server
+#while the light callbacks like the cards queue behind them. Their results are stored in a disk cache shared by the workers
+#under ZOMATO_BACKGROUND_CACHE_DIR, along with the version of the dataset. A job still running when its callback is fired
+#again, for eg. when the slider is moved while the world map is being drawn, is cancelled by Dash. Identical requests share
+#the result or the job already building it, instead of starting a process each (see background_jobs.py)
+background_callback_manager = None
+if os.environ.get('ZOMATO_BACKGROUND_CALLBACKS') == '1' and diskcache is not None:
+    background_callback_manager = background_jobs.SharedDiskcacheManager(
+        diskcache.Cache(os.environ.get('ZOMATO_BACKGROUND_CACHE_DIR', os.path.join(dataset.CACHE_DIR, 'callbacks'))),
+        cache_by=[lambda: dataset.current().version], expire=3600)
 
-# In[30]:
+#Keyword arguments of the callbacks drawing the heavy figures
+heavy_callback = {'background': True} if background_callback_manager is not None else {}
 
+#The responses of the server are compressed with brotli or gzip (through Flask-Compress), depending upon the browser
+app = dash.Dash(__name__, compress=True, background_callback_manager=background_callback_manager)
+server = app.server
 
-rating_df_cmap = zomato_dataset[zomato_dataset['Rating color']=='Dark Green']
-cmap_df = (rating_df_cmap['Country'].value_counts())
-cmap_df
+#The figures drawn by the callbacks are serialized and cached on the server under the selected values and the version of the
+#dataset, so that the same figure is not built again for every request. The number of cached figures can be set through
+#ZOMATO_FIGURE_CACHE_SIZE
+figure_cache = FigureCache(maxsize=int(os.environ.get('ZOMATO_FIGURE_CACHE_SIZE', 512)))
 
+#The views of the density map after the user has panned or zoomed it are seldom asked for twice, so they are kept in a small
+#cache of their own, sized through ZOMATO_MAP_VIEW_CACHE_SIZE, instead of pushing the other figures out of figure_cache
+map_view_cache = FigureCache(maxsize=int(os.environ.get('ZOMATO_MAP_VIEW_CACHE_SIZE', 32)))
 
-# In[31]:
 
+#Drops the figures drawn from the previous snapshot once a new one is published
+def clear_figure_caches(snapshot):
+    figure_cache.clear()
+    map_view_cache.clear()
 
-fig = px.choropleth(cmap_df, locations=cmap_df.index, locationmode='country names',color=cmap_df.values ,color_continuous_scale=px.colors.sequential.Reds)
-fig.update_layout(geo=dict(bgcolor= '#f4f4f2'), title_text = 'Restaurants having selected number of ★ by Country',title_x=0.5)
 
+#Every callback request is timed by phase and the metrics are served on /metrics (see metrics.py)
+#Setting ZOMATO_SERVER_TIMING=1 also sends the timings of every callback response in its Server-Timing header
+callback_metrics = metrics.instrument(app, figure_cache, server_timing=os.environ.get('ZOMATO_SERVER_TIMING') == '1')
 
-# Clearly a vast majority of them are in India itself.
+#The source files of the dataset are watched every ZOMATO_RELOAD_INTERVAL seconds, and the figures of the previous
+#snapshot are dropped from the cache whenever a new one is published
+if float(os.environ.get('ZOMATO_RELOAD_INTERVAL', 0)) > 0:
+    dataset_reloader = dataset.DatasetReloader(float(os.environ['ZOMATO_RELOAD_INTERVAL']),
+                                               on_reload=clear_figure_caches,
+                                               chunksize=stream_chunksize)
+    dataset_reloader.start()
 
-# ### Creating the Dashboard using Dash and Plotly
+#Largest number of nearest restaurants which can be listed in the sixth row
+nearest_max_results = 100
 
-# The first thing that we have to do is initialize the Dash app as follows:
+#Columns of the nearest restaurants listed in the sixth row
+nearest_columns = ['Restaurant Name', 'City', 'Aggregate rating', 'Average Cost for two', 'Cuisines']
 
-# In[32]:
+#Number of cities shown in the bar chart and the grouped bar chart when the dashboard is loaded
+top_cities_default = 10
 
 
-app = dash.Dash(__name__)
-server = app.server
+#This function draws the static pie chart in the second row of the dashboard, showing the presence of Zomato across the globe
+@figure_cache.memoize
+def update_country_pie(snapshot):
+    country_totals = snapshot.country_totals
+    pie_country_wise = px.pie(values=list(country_totals.values()), names=list(country_totals.keys()),
+                              color_discrete_sequence=px.colors.sequential.Reds_r)
+    pie_country_wise.update_traces(textposition='inside')
+    pie_country_wise.update_layout(uniformtext_minsize=12, uniformtext_mode='hide')
+    pie_country_wise.update_layout(title_text="Zomato's Presence around the World", title_x=0.5)
+    return pie_country_wise
 
 
 # Next, we specify the layout of the app, which describes what the application is supposed to look like. We have used the components such as html.Div, html.H1, html.P, dcc.Dropdown, dcc.Slider and dcc.Graph.
@@ -331,272 +187,471 @@ server = app.server
 # - The dash_core_components are higher-level components that are interactive and are generated with JavaScript, HTML, and CSS through the React.js library
 # - The html_components are normal components which are used in HTML
 
-# In[33]:
+# In[5]:
 
 
-app.layout = html.Div(children=[
+#The layout is built again for every page load from the current snapshot of the dataset, so that the cards, the list of
+#countries and the pie chart show the latest data after the dataset has been reloaded
+def serve_layout():
+    snapshot = dataset.current()
+    return html.Div(children=[
     
-    #This is the main header of the dashboard displaying the name - ZOMATO DASHBOARD
-    html.Div(children=[
+        #This is the main header of the dashboard displaying the name - ZOMATO DASHBOARD
+        html.Div(children=[
         
-            html.H1(children='ZOMATO DASHBOARD'), 
-            html.Div(children='A one-stop dashboard to get all your information about Zomato')],
-            style={'textAlign': 'center','backgroundColor':'#E23744','color': 'white','font-family':['Open Sans','sans-serif'], 
-                   'font-style': ['italic'],'padding-top':'20px','padding-bottom':'40px','fontSize':17}
-            ),
+                html.H1(children='ZOMATO DASHBOARD'), 
+                html.Div(children='A one-stop dashboard to get all your information about Zomato')],
+                style={'textAlign': 'center','backgroundColor':'#E23744','color': 'white','font-family':['Open Sans','sans-serif'], 
+                       'font-style': ['italic'],'padding-top':'20px','padding-bottom':'40px','fontSize':17}
+                ),
     
-    #This is the first row of the dashboard displaying three cards
-    html.Div(children=[
+        #This is the first row of the dashboard displaying three cards
+        html.Div(children=[
             
-            #The first one is for the number of restaurants on Zomato app from across the world
-            html.Div([
-                html.H3(children="NUMBER OF RESTAURANTS WORLDWIDE", style={'fontSize':25}),
-                html.P(zomato_dataset.shape[0], style={'fontSize':30})],
-                style={'display':'inline-block','width': '30%','textAlign': 'center','backgroundColor': '#2D2D2D',
-                       'color': 'white','margin':'25px','border-radius':'5px','box-shadow':'2px 2px 2px #1f2c56'}),
+                #The first one is for the number of restaurants on Zomato app from across the world
+                html.Div([
+                    html.H3(children="NUMBER OF RESTAURANTS WORLDWIDE", style={'fontSize':25}),
+                    html.P(len(snapshot.zomato_dataset), style={'fontSize':30})],
+                    style={'display':'inline-block','width': '30%','textAlign': 'center','backgroundColor': '#2D2D2D',
+                           'color': 'white','margin':'25px','border-radius':'5px','box-shadow':'2px 2px 2px #1f2c56'}),
             
-            #The second one displays the number of restaurants on Zomato app which are located in the country that has been
-            #selected from the first dropdown
-            html.Div([
-                html.H3(children="NUMBER OF RESTAURANTS IN SELECTED COUNTRY", style={'fontSize':25}),
-                html.P(id="numOfRestCountry", children=8652, style={'fontSize':30})],
-                style={'display':'inline-block','width': '30%','textAlign': 'center','backgroundColor': '#2D2D2D',
-                       'color': 'white','margin':'25px','border-radius':'5px','box-shadow':'2px 2px 2px #1f2c56'}),
+                #The second one displays the number of restaurants on Zomato app which are located in the country that has been
+                #selected from the first dropdown
+                html.Div([
+                    html.H3(children="NUMBER OF RESTAURANTS IN SELECTED COUNTRY", style={'fontSize':25}),
+                    html.P(id="numOfRestCountry", children=8652, style={'fontSize':30})],
+                    style={'display':'inline-block','width': '30%','textAlign': 'center','backgroundColor': '#2D2D2D',
+                           'color': 'white','margin':'25px','border-radius':'5px','box-shadow':'2px 2px 2px #1f2c56'}),
         
-            #The third card displays the number of restaurants on Zomato app which are located in the city that has been
-            #selected from the second dropdown
-            html.Div([
-                html.H3(children="NUMBER OF RESTAURANTS IN SELECTED CITY", style={'fontSize':25}),
-                html.P(id="numOfRestCity",children=20, style={'fontSize':30})],
-                style={'display':'inline-block','width': '30%','textAlign': 'center','backgroundColor': '#2D2D2D',
-                       'color': 'white','margin':'25px','border-radius':'5px','box-shadow':'2px 2px 2px #1f2c56'}),   
+                #The third card displays the number of restaurants on Zomato app which are located in the city that has been
+                #selected from the second dropdown
+                html.Div([
+                    html.H3(children="NUMBER OF RESTAURANTS IN SELECTED CITY", style={'fontSize':25}),
+                    html.P(id="numOfRestCity",children=20, style={'fontSize':30})],
+                    style={'display':'inline-block','width': '30%','textAlign': 'center','backgroundColor': '#2D2D2D',
+                           'color': 'white','margin':'25px','border-radius':'5px','box-shadow':'2px 2px 2px #1f2c56'}),   
         
-        ]),
+            ]),
     
-    #This is the second row of the dashboard
-    html.Div(children=[
+        #This is the search box of the dashboard, which suggests restaurants as their name, locality or address is typed
+        #Selecting a suggestion shows the details of the restaurant below it
+        html.Div(children=[
             
-            #This first div in the second row contains three different Dash core components 
-            #Two dropdown lists and a slider
-            html.Div(children=[
-                    
-                #The first component in this Div is a dropdown menu which displays the different countries from which
-                #different restaurants are displayed on the Zomato App
-                html.P('SELECT COUNTRY: ', style={'color':'white'}),
                 dcc.Dropdown(
-                        id="countries_dropdown",
+                        id="search_dropdown",
                         multi=False,
                         clearable=True,
-                        value='India',
-                        placeholder="Select Countries:",
-                        options=[{'label':c, 'value':c} for c in (contry_code_df['Country'])]),
-                html.Br(),
-                html.Br(),
-                    
-                #The second component in this Div is another dropdown menu which displays the different cities from the
-                #selected country in earlier dropdown list, from which different restaurants are displayed on Zomato App
-                html.P('SELECT CITY: ', style={'color':'white'}),
-                dcc.Dropdown(
-                        id="cities_dropdown",
-                        multi=False,
-                        clearable=True,
-                        value='New Delhi',
-                        placeholder="Select Cities:",
+                        placeholder="Search restaurants by name, locality or address",
                         options=[]),
-                html.Br(),
-                html.Br(), 
+                html.Div(id="search_details", style={'margin-top':'10px','fontSize':15})
+            
+            ], style={'margin-left':'25px','margin-right':'25px','font-family':['Open Sans','sans-serif']}),
+    
+        #This is the second row of the dashboard
+        html.Div(children=[
+            
+                #This first div in the second row contains three different Dash core components 
+                #Two dropdown lists and a slider
+                html.Div(children=[
                     
-                #The final component in this Div is a slider which allows us to select ratings from 0 to 5.  
-                #These ratings are based on the Rating colors specified for each restaurant. 
-                #0 means No Rating and 5 means Highest Rating 
-                html.P('SELECT RATING: ', style={'color':'white'}),
-                html.Br(),
-                dcc.Slider(
-                        id='slider',
-                        min=0,
-                        max=5,
-                        step=None,
-                        marks=
-                        {
-                            0: '0★',
-                            1: '1★',
-                            2: '2★',
-                            3: '3★',
-                            4: '4★',
-                            5: '5★'
-                        },
-                        value=5)
-                ],
-                style={'display':'inline-block','textAlign': 'left','backgroundColor': '#2D2D2D','color': 'black',
-                        'margin-left':'25px','margin-right':'25px','width':'30%','border-radius':'5px',
-                        'box-shadow':'2px 2px 2px #1f2c56','padding':'25px'}
-            ),
+                    #The first component in this Div is a dropdown menu which displays the different countries from which
+                    #different restaurants are displayed on the Zomato App
+                    html.P('SELECT COUNTRY: ', style={'color':'white'}),
+                    dcc.Dropdown(
+                            id="countries_dropdown",
+                            multi=False,
+                            clearable=True,
+                            value='India',
+                            placeholder="Select Countries:",
+                            options=[{'label':c, 'value':c} for c in (snapshot.zomato_dataset['Country'].cat.categories)]),
+                    html.Br(),
+                    html.Br(),
+                    
+                    #The second component in this Div is another dropdown menu which displays the different cities from the
+                    #selected country in earlier dropdown list, from which different restaurants are displayed on Zomato App
+                    html.P('SELECT CITY: ', style={'color':'white'}),
+                    dcc.Dropdown(
+                            id="cities_dropdown",
+                            multi=False,
+                            clearable=True,
+                            value='New Delhi',
+                            placeholder="Select Cities:",
+                            options=[]),
+                    html.Br(),
+                    
+                    #The third component in this Div is a dropdown menu of the cuisines served in the restaurants, which
+                    #filters the restaurants counted in the cards and drawn in the scatter plot. The restaurants can serve any
+                    #or all of the selected cuisines
+                    html.P('SELECT CUISINES: ', style={'color':'white'}),
+                    dcc.Dropdown(
+                            id="cuisines_dropdown",
+                            multi=True,
+                            clearable=True,
+                            value=[],
+                            placeholder="All Cuisines",
+                            options=[{'label':c, 'value':c} for c in snapshot.cuisines.cuisines]),
+                    dcc.RadioItems(
+                            id="cuisines_match",
+                            options=[{'label':' Any of them', 'value':'or'}, {'label':' All of them', 'value':'and'}],
+                            value='or',
+                            inline=True,
+                            labelStyle={'color':'white','margin-right':'15px'}),
+                    html.Br(), 
+                    
+                    #The next components filter the same restaurants by the services they offer and by their price range
+                    #No price range selected means every price range
+                    html.P('SELECT SERVICES AND PRICE RANGE: ', style={'color':'white'}),
+                    dcc.Checklist(
+                            id="services_checklist",
+                            options=[{'label':' Online delivery', 'value':'Has Online delivery'},
+                                     {'label':' Table booking', 'value':'Has Table booking'}],
+                            value=[],
+                            inline=True,
+                            labelStyle={'color':'white','margin-right':'15px'}),
+                    dcc.Checklist(
+                            id="prices_checklist",
+                            options=[{'label':' ' + '$' * price, 'value':price} for price in range(1, 5)],
+                            value=[],
+                            inline=True,
+                            labelStyle={'color':'white','margin-right':'15px'}),
+                    html.Br(), 
+                    
+                    #The next component in this Div is a range slider which allows us to select ratings from 0 to 5.  
+                    #These ratings are based on the Rating colors specified for each restaurant. 
+                    #0 means No Rating and 5 means Highest Rating 
+                    html.P('SELECT RATING: ', style={'color':'white'}),
+                    html.Br(),
+                    dcc.RangeSlider(
+                            id='slider',
+                            min=0,
+                            max=5,
+                            step=None,
+                            allowCross=False,
+                            marks=
+                            {
+                                0: '0★',
+                                1: '1★',
+                                2: '2★',
+                                3: '3★',
+                                4: '4★',
+                                5: '5★'
+                            },
+                            value=[0, 5]),
+                    html.Br(),
+                    
+                    #The last component in this Div is a slider which selects how many of the cities having the most
+                    #restaurants are shown in the bar chart and the grouped bar chart
+                    html.P('SELECT NUMBER OF CITIES: ', style={'color':'white'}),
+                    dcc.Slider(
+                            id='top_cities_slider',
+                            min=5,
+                            max=dataset.TOP_CITIES,
+                            step=5,
+                            value=top_cities_default)
+                    ],
+                    style={'display':'inline-block','textAlign': 'left','backgroundColor': '#2D2D2D','color': 'black',
+                            'margin-left':'25px','margin-right':'25px','width':'30%','border-radius':'5px',
+                            'box-shadow':'2px 2px 2px #1f2c56','padding':'25px'}
+                ),
             
             
-            #The second div in the second row displays a static pie chart showcasing the presence of Zomato across the globe
-            html.Div([
-                    dcc.Graph(
-                            id="pie-chart1", figure=pie_country_wise, 
-                            style={'display':'inline-block','width':'57vh',
-                                    'margin-left':'25px','margin-right':'25px','align':'center'})
-                    ]),
+                #The second div in the second row displays a static pie chart showcasing the presence of Zomato across the globe
+                html.Div([
+                        dcc.Graph(
+                                id="pie-chart1", figure=update_country_pie(snapshot), 
+                                style={'display':'inline-block','width':'57vh',
+                                        'margin-left':'25px','margin-right':'25px','align':'center'})
+                        ]),
         
-            #This third div in the second row displays a bar chart 
-            #This bar chart represents the Top 10 cities(from selected country) having the maximum number of restaurants listed
-            #on Zomato
-            html.Div([
-                    dcc.Graph(
-                            id="bar-chart", 
-                            style={'display':'inline-block','width':'57vh','margin-left':'25px','margin-right':'25px',
-                                   'align':'center'})]
-                    )], 
-
-            style={'display':'flex'}
-        ),
+                #This third div in the second row displays a bar chart 
+                #This bar chart represents the Top N cities(from selected country) having the maximum number of restaurants listed
+                #on Zomato, N being selected in the last slider
+                html.Div([
+                        dcc.Graph(
+                                id="bar-chart", 
+                                style={'display':'inline-block','width':'57vh','margin-left':'25px','margin-right':'25px',
+                                       'align':'center'})]
+                        )], 
+
+                style={'display':'flex'}
+            ),
     
-    #This is the third row of the dashboard
-    html.Div([
+        #This is the third row of the dashboard
+        html.Div([
             
-            #The first div in this row displays a grouped bar chart
-            #This grouped bar chart depicts the number of restaurants having and not having online delivery service, from the 
-            # Top 10 cities having maximum number of listings from selected country
-            html.Div([
-                    dcc.Graph(
-                            id="grouped-bar-chart", 
-                            style={'display':'inline-block','width':'57vh','margin-left':'25px','margin-right':'25px'})
-                    ]),
+                #The first div in this row displays a grouped bar chart
+                #This grouped bar chart depicts the number of restaurants having and not having online delivery service, from the 
+                # Top N cities having maximum number of listings from selected country
+                html.Div([
+                        dcc.Graph(
+                                id="grouped-bar-chart", 
+                                style={'display':'inline-block','width':'57vh','margin-left':'25px','margin-right':'25px'})
+                        ]),
             
         
-            #The second div in this row displays a scatter plot
-            #It shows how the rating of restaurant varies with the average price for two people for all restaurants in 
-            #the selected city
-            html.Div([
-                    dcc.Graph(
-                            id="scatter_plot", 
-                            style={'display':'inline-block','width':'62vh','margin-left':'25px','margin-right':'1px'})
-                    ]),
+                #The second div in this row displays a scatter plot
+                #It shows how the rating of restaurant varies with the average price for two people for all restaurants in 
+                #the selected city
+                html.Div([
+                        dcc.Loading(dcc.Graph(
+                                id="scatter_plot", 
+                                style={'display':'inline-block','width':'62vh','margin-left':'25px','margin-right':'1px'}),
+                                color='#E23744'),
+                    
+                        #For cities having too many restaurants the scatter plot shows how many restaurants there are in every
+                        #range of cost and rating, and clicking on (or selecting) a range lists its restaurants here
+                        html.Div(id="scatter_details", style={'width':'62vh','margin-left':'25px','fontSize':13})
+                        ]),
 
         
-            #The third div in this row displays a donut chart
-            #This chart shows the percentage of restaurants having selected number of stars(from slider) from different cities
-            #of the selected city
-            html.Div([
-                    dcc.Graph(
-                            id="donut_graph", 
-                            style={'display':'inline-block','width':'57vh','margin-left':'25px','margin-right':'25px'})]
-                    )], 
-
-            style={'display':'flex','margin-top':'25px'}
-        ),
+                #The third div in this row displays a donut chart
+                #This chart shows the percentage of restaurants having selected number of stars(from slider) from different cities
+                #of the selected city
+                html.Div([
+                        dcc.Graph(
+                                id="donut_graph", 
+                                style={'display':'inline-block','width':'57vh','margin-left':'25px','margin-right':'25px'})]
+                        )], 
+
+                style={'display':'flex','margin-top':'25px'}
+            ),
     
         
-    #This is the fourth row of the dashboard
-    html.Div([
+        #This is the fourth row of the dashboard
+        html.Div([
         
-        #This is the a graph which depicts the denisty of restaurants in a country having selected number of stars
-        html.Div([dcc.Graph(id="world_map")],style={'width':'90%','align':'center','margin-left':'25px','margin-right':'25px'})
+            #This is the a graph which depicts the denisty of restaurants in a country having selected number of stars
+            html.Div([dcc.Loading(dcc.Graph(id="world_map"), color='#E23744')],
+                     style={'width':'90%','align':'center','margin-left':'25px','margin-right':'25px'})
             
             
-        ]),
+            ]),
     
-    #This is the footer of the dashboard
-    html.Div(children=[
+        #This is the fifth row of the dashboard
+        html.Div([
+        
+            #This is a map which depicts the density of restaurants having selected number of stars in the selected country
+            #and city. Panning and zooming the map loads the counts of the visible area at the matching level of detail
+            html.Div([dcc.Graph(id="density_map", style={'height':'70vh'})],
+                     style={'width':'90%','align':'center','margin-left':'25px','margin-right':'25px','margin-top':'25px'})
+            
+            ]),
+    
+        #This is the sixth row of the dashboard
+        #It lists the restaurants nearest to a coordinate, which can be typed in or picked by clicking on the density map
+        html.Div([
+            
+                html.H3('Restaurants near me', style={'color':'#E23744'}),
+                html.Div([
+                        html.Label('Latitude:', style={'margin-right':'10px'}),
+                        dcc.Input(id="near_lat", type="number", min=-90, max=90, debounce=True,
+                                  style={'margin-right':'25px'}),
+                        html.Label('Longitude:', style={'margin-right':'10px'}),
+                        dcc.Input(id="near_lon", type="number", min=-180, max=180, debounce=True,
+                                  style={'margin-right':'25px'}),
+                        html.Label('Restaurants:', style={'margin-right':'10px'}),
+                        dcc.Input(id="near_k", type="number", min=1, max=nearest_max_results, step=1,
+                                  value=10, debounce=True)
+                        ]),
+                html.Div(id="nearest_restaurants", style={'margin-top':'15px','fontSize':13})
+            
+            ], style={'width':'90%','margin-left':'25px','margin-right':'25px','margin-top':'25px',
+                      'font-family':['Open Sans','sans-serif']}),
+    
+        #This is the seventh row of the dashboard
+        html.Div([
+        
+            #This is a box plot of the cost for two in US dollars of the restaurants of the selected country by number of stars
+            #The costs are converted from the local currencies, so they can be compared between countries
+            html.Div([dcc.Graph(id="cost_box_plot")],
+                     style={'width':'90%','align':'center','margin-left':'25px','margin-right':'25px','margin-top':'25px'})
+            
+            ]),
+    
+        #This is the footer of the dashboard
+        html.Div(children=[
          
-            html.Div(children='Created by: Meghna Rai')],
-            style={'textAlign': 'center','backgroundColor':'#E23744','color': 'white','font-family':['Open Sans','sans-serif'], 
-                   'font-style': ['italic'],'padding-top':'20px','padding-bottom':'20px','fontSize':17}
-            )
+                html.Div(children='Created by: Meghna Rai')],
+                style={'textAlign': 'center','backgroundColor':'#E23744','color': 'white','font-family':['Open Sans','sans-serif'], 
+                       'font-style': ['italic'],'padding-top':'20px','padding-bottom':'20px','fontSize':17}
+                )
     
-])
+    ])
 
 
-# Next, we specify the callback section of our Dash app. The callbacks are used to establish interactivity and communication between the different components of our Dashboard.
-# These are the functions that are automatically called by Dash whenever an input component's property changes, in order to update some property in another component (the output).
+app.layout = serve_layout
 
-# In[34]:
-
-
-#This callback function is used to set the values in the City Dropdown menu from Selected Country in Country Dropdown menu
-@app.callback(
-    Output("cities_dropdown", "options"),
-    Input("countries_dropdown", "value"))
-def get_city_options(countries_dropdown):
-    df_result = zomato_dataset[zomato_dataset['Country']==countries_dropdown]
-    return [{'label':i , 'value': i} for i in df_result['City'].unique()]
 
+# Next, we specify the callback section of our Dash app. The callbacks are used to establish interactivity and communication between the different components of our Dashboard.
+# These are the functions that are automatically called by Dash whenever an input component's property changes, in order to update some property in another component (the output).
 
-#This callback function is used to set the selected value in the City Dropdown menu as first city listed in the entire city list
-@app.callback(
-    Output("cities_dropdown", "value"),
-    Input("cities_dropdown", "options"))
-def get_city_options(cities_dropdown):
-    return [k['value'] for k in cities_dropdown][0]
+# In[6]:
 
 
-#This callback function is used to set the value displayed in the SECOND card
-#The total number of restaurants listed on Zomato from country selected in dropdown menu 
+#This callback function updates every part of the dashboard which depends upon the selected country and city in a single
+#round-trip. Changing the country used to fire the city options, the selected city, the two cards and the charts as separate
+#chained callbacks, now the first city of the country is selected here and all of them are returned in one response.
+#Only the outputs depending upon the input that actually changed are computed, the rest are left as they are.
+#The scatter plot is the exception, it has a callback of its own so that the cards never wait for it.
 @app.callback(
-    Output("numOfRestCountry", "children"),
-    Input("countries_dropdown", "value"))
-def get_city_options(countries_dropdown):
-    df_result = zomato_dataset[zomato_dataset['Country']==countries_dropdown]
-    return df_result.shape[0]
-
-
-#This callback function is used to set the value displayed in the THIRD card
-#The total number of restaurants listed on Zomato from city selected in dropdown menu 
+    [Output("cities_dropdown", "options"),
+     Output("cities_dropdown", "value"),
+     Output("numOfRestCountry", "children"),
+     Output("numOfRestCity", "children"),
+     Output("bar-chart", "figure"),
+     Output("grouped-bar-chart", "figure"),
+     Output("donut_graph", "figure"),
+     Output("cost_box_plot", "figure")],
+    [Input("countries_dropdown", "value"),
+     Input("cities_dropdown", "value"),
+     Input("slider", "value"),
+     Input("cuisines_dropdown", "value"),
+     Input("cuisines_match", "value"),
+     Input("services_checklist", "value"),
+     Input("prices_checklist", "value"),
+     Input("top_cities_slider", "value")])
+def update_dashboard(countri, city, stars, cuisines, match, services, prices, top_n):
+    snapshot = dataset.current()
+    filters = (stars, cuisines, match, services, prices)
+    
+    #A city has been selected from the City Dropdown menu, so only the THIRD card changes
+    if ctx.triggered_id == "cities_dropdown":
+        return (no_update, no_update, no_update, get_city_count(snapshot, city, *filters), no_update, no_update, no_update,
+                no_update)
+    
+    #The cuisines, services or price ranges have been changed, so the SECOND and THIRD cards change
+    if ctx.triggered_id in ("cuisines_dropdown", "cuisines_match", "services_checklist", "prices_checklist"):
+        return (no_update, no_update, get_country_count(snapshot, countri, *filters), get_city_count(snapshot, city, *filters), no_update,
+                no_update, no_update, no_update)
+    
+    #The range of ratings has been changed in the slider, so the SECOND and THIRD cards and the donut graph change
+    if ctx.triggered_id == "slider":
+        return (no_update, no_update, get_country_count(snapshot, countri, *filters), get_city_count(snapshot, city, *filters), no_update,
+                no_update, update_donut_graph(snapshot, countri, stars), no_update)
+    
+    #The number of cities has been changed, so only the bar chart and the grouped bar chart change
+    if ctx.triggered_id == "top_cities_slider":
+        return (no_update, no_update, no_update, no_update, update_bar_chart(snapshot, countri, top_n),
+                update_grouped_bar_chart(snapshot, countri, top_n), no_update, no_update)
+    
+    #A country has been selected (or the dashboard is being loaded), so the first city of the country is selected and
+    #everything is updated
+    cities = snapshot.city_options.get(countri, [])
+    city = cities[0] if cities else None
+    return ([{'label':i , 'value': i} for i in cities], city, get_country_count(snapshot, countri, *filters),
+            get_city_count(snapshot, city, *filters), update_bar_chart(snapshot, countri, top_n), update_grouped_bar_chart(snapshot, countri, top_n),
+            update_donut_graph(snapshot, countri, stars), update_cost_box_plot(snapshot, countri))
+
+
+#This callback function updates the scatter plot of the selected city
+#Drawing the scatter plot of a large city is slow, so it is not part of the callback above and is built in the background
+#when background callbacks are enabled. It is fired again once the callback above has selected the city of a new country
 @app.callback(
-    Output("numOfRestCity", "children"),
-    Input("cities_dropdown", "value"))
-def get_city_options(cities_dropdown):
-    df_result = zomato_dataset[zomato_dataset['City']==cities_dropdown]
-    return df_result.shape[0]
-
-
-#This callback function is used to update the bar chart displayed in the second row depending upon the country that has been
+    Output("scatter_plot", "figure"),
+    [Input("cities_dropdown", "value"),
+     Input("slider", "value"),
+     Input("cuisines_dropdown", "value"),
+     Input("cuisines_match", "value"),
+     Input("services_checklist", "value"),
+     Input("prices_checklist", "value")],
+    **heavy_callback)
+def update_scatter_view(city, stars, cuisines, match, services, prices):
+    return update_scatter_plot(dataset.current(), city, stars, cuisines, match, services, prices)
+
+
+#This function returns the value displayed in the SECOND card
+#The total number of restaurants listed on Zomato from country selected in dropdown menu, matching the selected filters
+def get_country_count(snapshot, countri, stars, cuisines, match, services, prices):
+    if not (cuisines or services or prices or star_filter(stars)):
+        return int(snapshot.country_totals.get(countri, 0))
+    with metrics.phase('aggregate'):
+        return bitmaps.count(filtered_bitmap(snapshot, 'Country', countri, stars, cuisines, match, services, prices))
+
+
+#This function returns the value displayed in the THIRD card
+#The total number of restaurants listed on Zomato from city selected in dropdown menu, matching the selected filters
+def get_city_count(snapshot, city, stars, cuisines, match, services, prices):
+    if not (cuisines or services or prices or star_filter(stars)):
+        return int(snapshot.city_totals.get(city, 0))
+    with metrics.phase('aggregate'):
+        return bitmaps.count(filtered_bitmap(snapshot, 'City', city, stars, cuisines, match, services, prices))
+
+
+#This function returns the numbers of stars selected in the slider, or no numbers when the whole range is selected, so
+#that the restaurants without a known rating are not left out then
+def star_filter(stars):
+    lo, hi = stars or (0, 5)
+    return [] if (lo, hi) == (0, 5) else list(range(lo, hi + 1))
+
+
+#This function returns the bitmap of the restaurants having the value in the Country or City column, which have the selected
+#number of stars, serve any or all (match) of the selected cuisines, offer the selected services and are in one of the
+#selected price ranges
+def filtered_bitmap(snapshot, column, value, stars, cuisines, match, services, prices):
+    filters = {column: [value], 'Stars': star_filter(stars), 'Price range': prices or []}
+    filters.update({service: [True] for service in services or []})
+    with metrics.phase('filter'):
+        return snapshot.filters.bitmap(filters, [snapshot.cuisines.bitmap(cuisines, match)] if cuisines else [])
+
+
+#Columns of the restaurants drawn in the scatter plot and listed under it
+scatter_columns = ['Restaurant Name', 'Average Cost for two', 'Aggregate rating', 'Votes']
+
+
+#This function returns the scatter_columns of the restaurants of the city matching the selected filters
+def select_city_restaurants(snapshot, city, stars, cuisines, match, services, prices):
+    with metrics.phase('filter'):
+        if not (cuisines or services or prices or star_filter(stars)):
+            return dataset.select_rows(snapshot.zomato_dataset, snapshot.city_rows, city, scatter_columns)
+        rows = bitmaps.rows(filtered_bitmap(snapshot, 'City', city, stars, cuisines, match, services, prices),
+                            len(snapshot.zomato_dataset))
+        return dataset.take_rows(snapshot.zomato_dataset, rows, scatter_columns)
+
+
+#This function is used to update the bar chart displayed in the second row depending upon the country that has been
 #selected
-@app.callback(
-    Output("bar-chart", "figure"),
-    [Input("countries_dropdown", "value")])
-def update_bar_chart(countri):
-    country_wise_df = zomato_dataset[zomato_dataset['Country']==countri]
-    city_count = (country_wise_df['City'].value_counts())
-    fig = px.bar(city_count, x=city_count.index[:10], y=city_count.values[:10],
-                 labels={"x": "Cities","y": "Number of Restaurants"},color_discrete_sequence=px.colors.qualitative.Set1)
+@figure_cache.memoize
+def update_bar_chart(snapshot, countri, top_n):
+    top_cities = lookup_top_cities(snapshot, countri, top_n)
+    fig = px.bar(top_cities, x='City', y='count',
+                 labels={"City": "Cities","count": "Number of Restaurants"},color_discrete_sequence=px.colors.qualitative.Set1)
     fig.update_layout(plot_bgcolor="#f4f4f2")
-    fig.update_layout(title_text='Top 10 cities in Selected Country', title_x=0.5)
+    fig.update_layout(title_text='Top %d cities in Selected Country' % top_n, title_x=0.5)
     return fig
 
 
-#This callback function is used to update the grouped bar chart displayed in the third row 
-#It takes the country selected in the dropdown as input and accordingly displays the Top 10 cities in that country having or not
-#having online delivery service
-@app.callback(
-    Output("grouped-bar-chart", "figure"),
-    [Input("countries_dropdown", "value")])
-def update_grouped_bar_chart(countri):
-    country_wise_df = zomato_dataset[zomato_dataset['Country']==countri]
-    city_count = (country_wise_df['City'].value_counts())
-    top_10_cities = list(city_count.index[:10])
-    
-    top_10_cities_df = country_wise_df[country_wise_df["City"].isin(top_10_cities)]
+#This function is used to update the grouped bar chart displayed in the third row 
+#It takes the country selected in the dropdown and the number of cities as input and accordingly displays the Top N cities in
+#that country having or not having online delivery service
+@figure_cache.memoize
+def update_grouped_bar_chart(snapshot, countri, top_n):
+    top_cities = lookup_top_cities(snapshot, countri, top_n)
     
-    fig2=px.histogram(top_10_cities_df, y=top_10_cities_df['City'], color="Has Online delivery",barmode='group',
-                      color_discrete_sequence=px.colors.sequential.Reds_r)
+    fig2 = go.Figure([go.Bar(x=top_cities[delivery], y=top_cities['City'], name=delivery, orientation='h',
+                             marker_color=color)
+                      for delivery, color in zip(['No', 'Yes'], px.colors.sequential.Reds_r)])
+    fig2.update_layout(barmode='group', legend_title_text='Has Online delivery', xaxis_title='count', yaxis_title='City')
     fig2.update_layout(plot_bgcolor="#f4f4f2")
     fig2.update_layout(title_text='Restraunts having online delivery service', title_x=0.5)
     
     return fig2
 
 
-#This callback function is used to update the scatter displayed in the third row 
-#It takes the city selected in the dropdown as input and accordingly displays how the rating of restaurants in that city varies
-#with their average prices
-@app.callback(
-    Output("scatter_plot", "figure"),
-    [Input("cities_dropdown", "value")])
-def update_scatter_plot(city):
-    city_wise_df = zomato_dataset[zomato_dataset['City']==city]
+#This function returns the top_n cities of the country having the most restaurants, along with the number of their restaurants
+#having and not having online delivery, from the ranking precomputed with the dataset
+def lookup_top_cities(snapshot, countri, top_n):
+    with metrics.phase('aggregate'):
+        return dataset.select_top_cities(snapshot.top_cities, countri, top_n)
+
+
+#This function is used to update the scatter displayed in the third row 
+#It takes the city selected in the dropdown along with the selected filters as input and accordingly displays how the rating
+#of restaurants in that city varies with their average prices
+@figure_cache.memoize
+def update_scatter_plot(snapshot, city, stars, cuisines, match, services, prices):
+    city_wise_df = select_city_restaurants(snapshot, city, stars, cuisines, match, services, prices)
+    if len(city_wise_df) > scatter_max_points:
+        return density_scatter_plot(city_wise_df)
     fig = px.scatter(city_wise_df, x="Average Cost for two", y="Aggregate rating",color="Average Cost for two",
                      color_continuous_scale=px.colors.sequential.Reds_r,hover_data=["Restaurant Name"])
     fig.update_layout(plot_bgcolor="#f4f4f2")
@@ -604,30 +659,76 @@ def update_scatter_plot(city):
     return fig
 
 
-#This callback function is used to update the donut graph displayed in the third row 
-#It takes the country selected in the dropdown as well as the rating selected in the slider as input 
-#It accordingly displays a graph depecting the % of restaurants in each city of that country having those many stars
+#Cities having more restaurants than ZOMATO_SCATTER_MAX_POINTS are not drawn point by point, as sending every restaurant to
+#the browser becomes too slow. Instead the restaurants are counted in a grid of ZOMATO_SCATTER_BINS x ZOMATO_SCATTER_BINS
+#ranges of cost and rating, and every range having restaurants is drawn as a single WebGL marker sized by its count
+scatter_max_points = int(os.environ.get('ZOMATO_SCATTER_MAX_POINTS', 5000))
+scatter_bins = int(os.environ.get('ZOMATO_SCATTER_BINS', 60))
+
+#Number of restaurants listed when a range of cost and rating is clicked
+scatter_details_rows = 20
+
+
+#This function draws the scatter plot of a city having too many restaurants as the density of restaurants per range of cost
+#and rating. The bounds of every range are sent along as custom data, so that its restaurants can be listed when clicked
+def density_scatter_plot(city_wise_df):
+    counts, cost_edges, rating_edges = np.histogram2d(city_wise_df['Average Cost for two'], city_wise_df['Aggregate rating'],
+                                                      bins=scatter_bins)
+    cost_bins, rating_bins = np.nonzero(counts)
+    bin_counts = counts[cost_bins, rating_bins]
+    fig = go.Figure(go.Scattergl(
+        x=(cost_edges[cost_bins] + cost_edges[cost_bins + 1]) / 2,
+        y=(rating_edges[rating_bins] + rating_edges[rating_bins + 1]) / 2,
+        mode='markers',
+        marker=dict(size=6 + 24 * np.sqrt(bin_counts / bin_counts.max()), color=bin_counts,
+                    colorscale=px.colors.sequential.Reds, showscale=True, colorbar=dict(title='Restaurants')),
+        customdata=np.column_stack([cost_edges[cost_bins], cost_edges[cost_bins + 1],
+                                    rating_edges[rating_bins], rating_edges[rating_bins + 1]]),
+        hovertemplate=('Average Cost for two: %{customdata[0]:.0f} - %{customdata[1]:.0f}<br>'
+                       'Aggregate rating: %{customdata[2]:.1f} - %{customdata[3]:.1f}<br>'
+                       'Restaurants: %{marker.color}<extra></extra>')))
+    fig.update_layout(plot_bgcolor="#f4f4f2", xaxis_title="Average Cost for two", yaxis_title="Aggregate rating")
+    fig.update_layout(title_text='Cost for Two vs. Rating per City', title_x=0.2)
+    return fig
+
+
+#This callback function lists the restaurants of the ranges of cost and rating which have been clicked or selected in the
+#scatter plot of a city having too many restaurants. Points of the regular scatter plot already show their restaurant when
+#hovered, so nothing is listed for them
 @app.callback(
-    Output("donut_graph", "figure"),
-    [Input("countries_dropdown", "value"),Input("slider", "value")])
-def update_scatter_plot(countri,val):
-    country_df = zomato_dataset[zomato_dataset['Country']==countri]
+    Output("scatter_details", "children"),
+    [Input("scatter_plot", "clickData"), Input("scatter_plot", "selectedData")],
+    [State("cities_dropdown", "value"), State("slider", "value"), State("cuisines_dropdown", "value"),
+     State("cuisines_match", "value"), State("services_checklist", "value"), State("prices_checklist", "value")],
+    prevent_initial_call=True)
+def show_scatter_details(click_data, selected_data, city, stars, cuisines, match, services, prices):
+    points = (ctx.triggered[0]['value'] or {}).get('points', [])
+    bins = [point['customdata'] for point in points if len(point.get('customdata') or []) == 4]
+    if not bins:
+        return []
     
-    op='Dark Green'
-    if(val == 0):
-        op = 'White'
-    elif(val==1):
-        op = 'Red'
-    elif(val==2):
-        op = 'Orange'
-    elif(val==3):
-        op = 'Yellow'
-    elif(val==4):
-        op = 'Green'
-    elif(val==5):
-        op = 'Dark Green'
-    rating_df = country_df[country_df['Rating color']==op]
-    rating_wise_city_df = rating_df['City'].value_counts()
+    city_wise_df = select_city_restaurants(dataset.current(), city, stars, cuisines, match, services, prices)
+    cost = city_wise_df['Average Cost for two']
+    rating = city_wise_df['Aggregate rating']
+    in_bins = np.zeros(len(city_wise_df), dtype=bool)
+    for cost_from, cost_to, rating_from, rating_to in bins:
+        in_bins |= ((cost >= cost_from) & (cost <= cost_to) & (rating >= rating_from) & (rating <= rating_to)).to_numpy()
+    restaurants = city_wise_df[in_bins].nlargest(scatter_details_rows, 'Votes')
+    
+    return [html.P("%d restaurants in the selected range, most voted first:" % in_bins.sum()),
+            html.Ul([html.Li("%s (%d for two, %.1f★)" % (name, cost_for_two, aggregate_rating))
+                     for name, cost_for_two, aggregate_rating in zip(restaurants['Restaurant Name'],
+                                                                      restaurants['Average Cost for two'],
+                                                                      restaurants['Aggregate rating'])])]
+
+
+#This function is used to update the donut graph displayed in the third row 
+#It takes the country selected in the dropdown as well as the range of ratings selected in the slider as input 
+#It accordingly displays a graph depecting the % of restaurants in each city of that country having those many stars
+@figure_cache.memoize
+def update_donut_graph(snapshot, countri, stars):
+    rating_wise_city_df = sum_star_range(lookup_counts(snapshot.counts['rating_city'], countri), stars, 'City')
+    rating_wise_city_df = rating_wise_city_df.sort_values(ascending=False)
     pie_rating_wise = px.pie(rating_wise_city_df, values=rating_wise_city_df.values, names=rating_wise_city_df.index, 
                              color_discrete_sequence=px.colors.sequential.Reds_r, hole=0.6)
     pie_rating_wise.update_traces(textposition='inside')
@@ -636,30 +737,47 @@ def update_scatter_plot(countri,val):
     return pie_rating_wise
 
 
+#This function is used to update the box plot displayed in the seventh row
+#It takes the country selected in the dropdown as input and draws the distribution of the cost for two in US dollars of its
+#restaurants for every number of stars, along with all of its restaurants, from the quantiles precomputed with the dataset
+@figure_cache.memoize
+def update_cost_box_plot(snapshot, countri):
+    cost_stats = snapshot.cost_stats
+    labels, stats = [], []
+    try:
+        stats.append(cost_stats['country'].loc[countri])
+        labels.append('All')
+        rating_stats = cost_stats['country_rating'].loc[countri]
+        for val in range(6):
+            if val in rating_stats.index:
+                stats.append(rating_stats.loc[val])
+                labels.append('%d★' % val)
+    except KeyError:
+        pass
+    
+    fig = go.Figure(go.Box(x=labels, q1=[s['q1'] for s in stats], median=[s['median'] for s in stats],
+                           q3=[s['q3'] for s in stats], lowerfence=[s['min'] for s in stats],
+                           upperfence=[s['max'] for s in stats], mean=[s['mean'] for s in stats],
+                           marker_color=px.colors.sequential.Reds[-2], name='Cost for two (USD)'))
+    fig.update_layout(plot_bgcolor="#f4f4f2", xaxis_title="Number of ★", yaxis_title="Cost for two (USD)")
+    fig.update_layout(title_text='Cost for Two in US Dollars vs. Rating in Selected Country', title_x=0.5)
+    return fig
+
+
 #This callback function is used to update the world map choropleth displayed in the fourth row 
 #It takes the country selected in the dropdown as input 
 #This map depicts the denisty of restaurants having selected number of stars, from across the world
 @app.callback(
     Output("world_map", "figure"),
-    [Input("slider", "value")])
-def update_world_map(val):
-    
-    op='Dark Green'
-    if(val == 0):
-        op = 'White'
-    elif(val==1):
-        op = 'Red'
-    elif(val==2):
-        op = 'Orange'
-    elif(val==3):
-        op = 'Yellow'
-    elif(val==4):
-        op = 'Green'
-    elif(val==5):
-        op = 'Dark Green'
-        
-    rating_df_cmap = zomato_dataset[zomato_dataset['Rating color']==op]
-    cmap_df = (rating_df_cmap['Country'].value_counts())
+    [Input("slider", "value")],
+    **heavy_callback)
+def update_world_map_view(stars):
+    return update_world_map(dataset.current(), stars)
+
+
+@figure_cache.memoize
+def update_world_map(snapshot, stars):
+    cmap_df = sum_star_range(snapshot.counts['country_rating'], stars, 'Country')
     
     fig_world = px.choropleth(cmap_df, locations=cmap_df.index, locationmode='country names',color=cmap_df.values ,
                               color_continuous_scale=px.colors.sequential.Reds)
@@ -668,6 +786,174 @@ def update_world_map(val):
     return fig_world
 
 
+#This callback function is used to update the density map displayed in the fifth row 
+#It takes the country and city selected in the dropdowns and the range of ratings selected in the slider as input, along
+#with the area of the map which is visible after the user has panned or zoomed it
+@app.callback(
+    Output("density_map", "figure"),
+    [Input("countries_dropdown", "value"), Input("cities_dropdown", "value"), Input("slider", "value"),
+     Input("density_map", "relayoutData")])
+def update_density_map_view(countri, city, stars, relayout_data):
+    snapshot = dataset.current()
+    #The map has been panned or zoomed, so only the cells of the tiles covering the visible area are drawn
+    if ctx.triggered_id == "density_map" and relayout_data and 'mapbox.zoom' in relayout_data:
+        level = spatial.level_for_zoom(relayout_data['mapbox.zoom'])
+        coordinates = relayout_data.get('mapbox._derived', {}).get('coordinates')
+        tiles = None
+        if coordinates:
+            lons, lats = [lon for lon, lat in coordinates], [lat for lon, lat in coordinates]
+            tiles = spatial.tiles_for_bounds((min(lons), max(lons), min(lats), max(lats)), level)
+        return update_density_map_pan(snapshot, countri, city, stars, level, tiles)
+    if ctx.triggered_id == "density_map":
+        return no_update
+    
+    #The filters have changed, so the map is centered on the selected restaurants at a zoom level showing all of them
+    return update_density_map(snapshot, countri, city, stars, None, None)
+
+
+#This function draws the density map from the cells of the grid at a level, for the given tiles
+#Without a level the map is centered on the selected restaurants, with the level chosen to show all of them
+def draw_density_map(snapshot, countri, city, stars, level, tiles):
+    grid = snapshot.grid
+    layout = {}
+    if level is None:
+        extent = grid.cells(grid.levels[len(grid.levels) // 2], countri, city, stars)
+        if len(extent):
+            lon_span = max(extent['lon'].max() - extent['lon'].min(), 0.05)
+            zoom = float(np.clip(np.log2(360 / lon_span), 1, 13))
+            layout = dict(center=dict(lon=float(extent['lon'].mean()), lat=float(extent['lat'].mean())), zoom=zoom)
+            level = spatial.level_for_zoom(zoom)
+        else:
+            level = grid.levels[0]
+    cells = grid.cells(level, countri, city, stars, tiles)
+    
+    fig = go.Figure(go.Densitymapbox(lon=cells['lon'], lat=cells['lat'], z=cells['count'], radius=12,
+                                     colorscale=px.colors.sequential.Reds, colorbar=dict(title='Restaurants'),
+                                     hovertemplate='Restaurants: %{z}<extra></extra>'))
+    fig.update_layout(mapbox=dict(style='open-street-map', **layout), margin=dict(l=0, r=0, t=50, b=0),
+                      uirevision='%s|%s|%d-%d' % (countri, city, *stars))
+    fig.update_layout(title_text='Density of restaurants having selected number of ★', title_x=0.5)
+    return fig
+
+
+#The centered maps are cached along with the other figures, and the panned or zoomed views in map_view_cache
+update_density_map = figure_cache.memoize(draw_density_map)
+update_density_map_pan = map_view_cache.memoize(draw_density_map)
+
+
+#This callback function lists the restaurants nearest to the coordinate typed in, or to the point clicked on the density map
+#A click also fills in the coordinate, so the number of restaurants listed can be changed afterwards
+@app.callback(
+    [Output("near_lat", "value"), Output("near_lon", "value"), Output("nearest_restaurants", "children")],
+    [Input("near_lat", "value"), Input("near_lon", "value"), Input("near_k", "value"), Input("density_map", "clickData")],
+    prevent_initial_call=True)
+def show_nearest_restaurants(lat, lon, k, click_data):
+    if ctx.triggered_id == "density_map":
+        if not click_data or not click_data.get('points'):
+            return no_update, no_update, no_update
+        lat, lon = click_data['points'][0]['lat'], click_data['points'][0]['lon']
+    if lat is None or lon is None or not k:
+        return no_update, no_update, []
+    
+    snapshot = dataset.current()
+    rows, distances = snapshot.nearest.nearest(lon, lat, min(k, nearest_max_results))
+    restaurants = dataset.take_rows(snapshot.zomato_dataset, rows, nearest_columns)
+    
+    header = html.Tr([html.Th(column) for column in ['Restaurant', 'City', 'Distance (km)', 'Aggregate rating',
+                                                       'Average Cost for two', 'Cuisines']])
+    table_rows = [html.Tr([html.Td(name), html.Td(city), html.Td("%.2f" % distance), html.Td("%.1f★" % aggregate_rating),
+                           html.Td(cost_for_two), html.Td(cuisines)])
+                  for name, city, distance, aggregate_rating, cost_for_two, cuisines in zip(
+                      restaurants['Restaurant Name'], restaurants['City'], distances, restaurants['Aggregate rating'],
+                      restaurants['Average Cost for two'], restaurants['Cuisines'])]
+    return lat, lon, html.Table([header] + table_rows, style={'width':'100%'})
+
+
+#Columns of the restaurants suggested in the search box, and of the restaurant selected in it
+search_columns = ['Restaurant ID', 'Restaurant Name', 'Locality', 'City']
+search_details_columns = search_columns + ['Country', 'Cuisines', 'Average Cost for two', 'Aggregate rating', 'Votes']
+
+
+#This function returns the label of a restaurant suggested in the search box
+def restaurant_label(restaurant):
+    return "%s - %s, %s" % (restaurant['Restaurant Name'], restaurant['Locality'], restaurant['City'])
+
+
+#This callback function suggests the restaurants matching the text typed in the search box
+#The selected restaurant is kept in the suggestions, as the dropdown only shows a value found in its options
+@app.callback(
+    Output("search_dropdown", "options"),
+    [Input("search_dropdown", "search_value")],
+    [State("search_dropdown", "value"), State("search_dropdown", "options")],
+    prevent_initial_call=True)
+def suggest_restaurants(search_value, value, options):
+    if not search_value:
+        return no_update
+    
+    snapshot = dataset.current()
+    restaurants = dataset.take_rows(snapshot.zomato_dataset, snapshot.search.search(search_value), search_columns)
+    suggestions = [{'label': restaurant_label(restaurant), 'value': int(restaurant['Restaurant ID'])}
+                   for restaurant in restaurants.to_dict('records')]
+    selected = [option for option in options or [] if option['value'] == value]
+    return selected + [option for option in suggestions if option['value'] != value]
+
+
+#This callback function shows the details of the restaurant selected in the search box
+@app.callback(
+    Output("search_details", "children"),
+    [Input("search_dropdown", "value")],
+    prevent_initial_call=True)
+def show_search_details(restaurant_id):
+    if restaurant_id is None:
+        return []
+    snapshot = dataset.current()
+    row = snapshot.search.find(restaurant_id)
+    if row is None:
+        return []
+    restaurant = dataset.take_rows(snapshot.zomato_dataset, [row], search_details_columns).iloc[0]
+    return html.P("%s, %s: %s - %d for two, %.1f★ from %d votes" % (
+        restaurant_label(restaurant), restaurant['Country'], restaurant['Cuisines'], restaurant['Average Cost for two'],
+        restaurant['Aggregate rating'], restaurant['Votes']))
+
+
+# ### Warming up the figure cache
+
+# There are only a few countries and 21 ranges of ratings, so all the figures of the bar chart, grouped bar chart, donut graph,
+# world map and cost box plot can be rendered ahead of time (see warmup.py). Figures rendered at build time are loaded from
+# the file set in ZOMATO_FIGURE_CACHE_FILE, and setting ZOMATO_WARMUP=1 renders all of them in parallel when the app starts.
+# Under gunicorn they are rendered once into that file before the workers are started (see gunicorn.conf.py).
+
+# In[7]:
+
+
+#The undecorated functions drawing the figures which are rendered ahead of time, by their names
+figure_builders = {inspect.unwrap(f).__name__: inspect.unwrap(f)
+                   for f in (update_bar_chart, update_grouped_bar_chart, update_donut_graph, update_world_map,
+                             update_cost_box_plot)}
+
+
+#Returns the (function name, arguments) of every figure that can be rendered ahead of time
+def warmup_tasks():
+    ratings = [(lo, hi) for lo in range(6) for hi in range(lo, 6)]
+    tasks = [('update_world_map', (stars,)) for stars in ratings]
+    for countri in dataset.current().country_totals:
+        tasks.append(('update_bar_chart', (countri, top_cities_default)))
+        tasks.append(('update_grouped_bar_chart', (countri, top_cities_default)))
+        tasks.append(('update_cost_box_plot', (countri,)))
+        tasks.extend(('update_donut_graph', (countri, stars)) for stars in ratings)
+    return tasks
+
+
+#The cache is made large enough to hold every figure rendered ahead of time
+#The figures are only rendered here when they could not be loaded from a file
+if os.environ.get('ZOMATO_FIGURE_CACHE_FILE') and os.path.exists(os.environ['ZOMATO_FIGURE_CACHE_FILE']):
+    figure_cache.maxsize = max(figure_cache.maxsize, len(warmup_tasks()))
+    figure_cache.load(os.environ['ZOMATO_FIGURE_CACHE_FILE'])
+elif os.environ.get('ZOMATO_WARMUP') == '1':
+    import warmup
+    warmup.prerender(figure_builders, warmup_tasks(), figure_cache)
+
+
 # Finally, we run the application on our local server and get the final outcome.
 
 # In[ ]:
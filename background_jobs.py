@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ## Background callbacks shared by identical requests
+
+# Dash runs every request to a background callback in a new process, which stores its result in a disk cache under a key
+# made from the callback inputs and the version of the dataset. It starts that process even when the result is already in
+# the cache, and every one of several identical requests arriving together starts its own process building the same figure.
+#
+# The SharedDiskcacheManager returns a result which is already cached without starting any process. Every process it starts
+# also takes a lock on its key in the disk cache, which is shared by all the gunicorn workers. Only the process holding the
+# lock builds the figure, the others wait for its result. When the process holding the lock is cancelled before storing its
+# result, a waiting process takes the lock over and builds the figure itself.
+
+import os
+import time
+
+from dash import DiskcacheManager
+
+#Seconds between two checks of a waiting process for the result or the lock
+POLL_INTERVAL = 0.05
+
+#Prefix of the keys of the locks in the disk cache
+LOCK_PREFIX = 'building-'
+
+
+class SharedDiskcacheManager(DiskcacheManager):
+
+    #Returns a job for the key, or 0 when its result is already cached and no process is needed
+    def call_job_fn(self, key, job_fn, args, context):
+        if self.result_ready(key):
+            return 0
+        return super().call_job_fn(key, job_fn, args, context)
+
+    #The browser does not send back a job 0, so a missing job is never running and never terminated
+    def job_running(self, job):
+        return bool(job) and super().job_running(job)
+
+    def terminate_job(self, job):
+        if job and int(job):
+            super().terminate_job(job)
+
+    #Returns the function run by the process of a job, which only runs the callback while it holds the lock of its key
+    def make_job_fn(self, fn, progress):
+        job_fn = super().make_job_fn(fn, progress)
+        handle = self.handle
+
+        def shared_job_fn(result_key, progress_key, user_callback_args, context):
+            lock_key = LOCK_PREFIX + result_key
+            while handle.get(result_key) is None:
+                if handle.add(lock_key, os.getpid(), expire=self.expire):
+                    try:
+                        job_fn(result_key, progress_key, user_callback_args, context)
+                    finally:
+                        handle.delete(lock_key)
+                    return
+                #A process killed while holding the lock never releases it
+                builder = handle.get(lock_key)
+                if builder is not None and not self.job_running(builder):
+                    with handle.transact():
+                        if handle.get(lock_key) == builder:
+                            handle.delete(lock_key)
+                    continue
+                time.sleep(POLL_INTERVAL)
+
+        return shared_job_fn
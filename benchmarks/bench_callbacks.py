@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ## Callback benchmark on synthetic datasets
+
+# Generates synthetic datasets having the schema of zomato.csv at 100k, 1M and 10M rows, and measures on each of them:
+#
+# - loading the dataset, both when the cache has to be built and when it is read back
+# - every function drawing a part of the dashboard, called directly
+# - the round trip of the callbacks through /_dash-update-component, with the Flask test client
+#
+# The synthetic restaurants are drawn with replacement from the restaurants of zomato.csv, so they keep its skew towards
+# India and New Delhi, and are given new ids, slightly moved coordinates and new vote counts. The datasets are written to
+# benchmarks/data and reused by the later runs. Every size is measured in a new process, which reports its peak memory, and
+# the figure cache is disabled so that every call builds its figure.
+#
+#     python benchmarks/bench_callbacks.py [--rows 100000 1000000 10000000] [--repeat 20] [--json results.json]
+#
+# Passing the results of an earlier run with --baseline fails the benchmark when a p99 latency grew by more than the given
+# tolerance, so performance regressions are caught before deploying:
+#
+#     python benchmarks/bench_callbacks.py --rows 100000 --baseline results.json --tolerance 0.25
+
+import argparse
+import atexit
+import csv
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(REPO_DIR, 'benchmarks', 'data')
+
+SIZES = (100_000, 1_000_000, 10_000_000)
+
+#The functions of app.py called directly with the current snapshot of the dataset, with their other arguments
+CALLS = [
+    ('get_country_count', ('India', [0, 5], [], 'or', [], [])),
+    ('get_city_count', ('New Delhi', [3, 5], ['North Indian'], 'or', ['Has Online delivery'], [])),
+    ('update_bar_chart', ('India', 10)),
+    ('update_grouped_bar_chart', ('India', 10)),
+    ('update_scatter_plot', ('New Delhi', [0, 5], [], 'or', [], [])),
+    ('update_donut_graph', ('India', [5, 5])),
+    ('update_world_map', ([5, 5],)),
+    ('update_cost_box_plot', ('India',)),
+    ('update_density_map', ('India', 'New Delhi', [5, 5], None, None)),
+]
+
+#The callbacks requested through /_dash-update-component, by their function name and the input which fired them
+REQUESTS = [
+    ('update_dashboard', 'countries_dropdown.value'),
+    ('update_dashboard', 'cities_dropdown.value'),
+    ('update_dashboard', 'slider.value'),
+    ('update_scatter_view', 'cities_dropdown.value'),
+    ('update_world_map_view', 'slider.value'),
+    ('update_density_map_view', 'countries_dropdown.value'),
+    ('suggest_restaurants', 'search_dropdown.search_value'),
+]
+
+#Values of the inputs and states of the callbacks, the others are None
+VALUES = {
+    'countries_dropdown.value': 'India',
+    'cities_dropdown.value': 'New Delhi',
+    'slider.value': [0, 5],
+    'cuisines_dropdown.value': [],
+    'cuisines_match.value': 'or',
+    'services_checklist.value': [],
+    'prices_checklist.value': [],
+    'search_dropdown.search_value': 'pizz',
+    'top_cities_slider.value': 10,
+}
+
+
+#Writes a synthetic dataset of the given number of rows to the path, in chunks of chunksize rows
+def synthetic_csv(rows, path, seed=0, chunksize=1_000_000):
+    base = pd.read_csv(os.path.join(REPO_DIR, 'zomato.csv'), encoding="ISO-8859-1")
+    rng = np.random.default_rng(seed)
+    tmp_path = path + '.tmp'
+    for start in range(0, rows, chunksize):
+        count = min(chunksize, rows - start)
+        chunk = base.iloc[rng.integers(0, len(base), size=count)].reset_index(drop=True)
+        chunk['Restaurant ID'] = np.arange(start + 1, start + count + 1)
+        moved = (chunk['Longitude'] != 0) | (chunk['Latitude'] != 0)
+        chunk.loc[moved, 'Longitude'] += rng.normal(0, 0.01, size=moved.sum())
+        chunk.loc[moved, 'Latitude'] += rng.normal(0, 0.01, size=moved.sum())
+        chunk['Votes'] = rng.poisson(chunk['Votes'].to_numpy() + 1)
+        #Every text is quoted, as some addresses hold a bare carriage return which would otherwise end the row
+        chunk.to_csv(tmp_path, mode='w' if start == 0 else 'a', header=start == 0, index=False, encoding="ISO-8859-1",
+                     quoting=csv.QUOTE_NONNUMERIC)
+    os.replace(tmp_path, path)
+    return path
+
+
+#Returns the path of the synthetic dataset of the given number of rows, generating it when it does not exist yet
+def dataset_path(rows):
+    path = os.path.join(DATA_DIR, 'zomato-%d.csv' % rows)
+    if not os.path.exists(path):
+        os.makedirs(DATA_DIR, exist_ok=True)
+        print("Generating %s" % path, file=sys.stderr)
+        synthetic_csv(rows, path)
+    return path
+
+
+#Returns the p50 and p99 in milliseconds of the times of calling the function
+def latencies(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    return {'p50': float(np.percentile(times, 50)), 'p99': float(np.percentile(times, 99))}
+
+
+#Returns the body of a /_dash-update-component request for the callback of the output, fired by the changed input
+#spec holds the inputs and the state of the callback, as in app.callback_map or in the /_dash-dependencies of the server
+def update_component_payload(output, spec, changed, values=VALUES):
+    if output.startswith('..'):
+        outputs = [dict(zip(('id', 'property'), part.rsplit('.', 1))) for part in output[2:-2].split('...')]
+    else:
+        outputs = dict(zip(('id', 'property'), output.rsplit('.', 1)))
+
+    def with_values(dependencies):
+        return [dict(dependency, value=values.get('%s.%s' % (dependency['id'], dependency['property'])))
+                for dependency in dependencies]
+    return {'output': output, 'outputs': outputs, 'inputs': with_values(spec['inputs']),
+            'state': with_values(spec['state']), 'changedPropIds': [changed]}
+
+
+#Measures everything on the dataset in the csv file, in the current process, and returns the results
+def measure(csv_file, repeat):
+    cache_dir = tempfile.mkdtemp(prefix='zomato-bench-')
+    atexit.register(shutil.rmtree, cache_dir, True)
+    os.environ.update({'ZOMATO_CSV_FILE': csv_file, 'ZOMATO_CACHE_DIR': cache_dir, 'ZOMATO_FIGURE_CACHE_SIZE': '0',
+                       'ZOMATO_MAP_VIEW_CACHE_SIZE': '0', 'ZOMATO_WARMUP': '0'})
+    os.chdir(REPO_DIR)
+    sys.path.insert(0, REPO_DIR)
+    import dataset
+
+    results = {}
+    start = time.perf_counter()
+    dataset.load_dataset()
+    results['load dataset (build cache)'] = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    dataset.load_snapshot()
+    results['load snapshot (from cache)'] = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    import app
+    results['import app'] = (time.perf_counter() - start) * 1000
+
+    snapshot = dataset.current()
+    calls = {name: latencies(lambda: getattr(app, name)(snapshot, *args), repeat) for name, args in CALLS}
+
+    client = app.server.test_client()
+    client.get('/_dash-layout')
+    requests = {}
+    for name, changed in REQUESTS:
+        output, spec = next((output, spec) for output, spec in app.app.callback_map.items()
+                            if getattr(spec['callback'], '__name__', None) == name)
+        payload = update_component_payload(output, spec, changed)
+
+        def post():
+            response = client.post('/_dash-update-component', json=payload)
+            if response.status_code not in (200, 204):
+                raise RuntimeError("%s failed with status %d" % (name, response.status_code))
+        requests['%s <- %s' % (name, changed)] = latencies(post, repeat)
+
+    return {'rows': len(dataset.current().zomato_dataset), 'load_ms': results, 'calls': calls, 'requests': requests,
+            'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+
+
+#Prints the results of a size
+def report(result):
+    print("\n%d rows, peak RSS %.1f MB" % (result['rows'], result['peak_rss_mb']))
+    for name, ms in result['load_ms'].items():
+        print("  %-58s %10.1f ms" % (name, ms))
+    for section in ('calls', 'requests'):
+        print("  %-58s %10s %10s" % (section, 'p50 ms', 'p99 ms'))
+        for name, latency in result[section].items():
+            print("    %-56s %10.2f %10.2f" % (name, latency['p50'], latency['p99']))
+
+
+#Returns the p99 latencies which grew by more than the tolerance over the baseline results
+def regressions(results, baseline, tolerance):
+    failures = []
+    previous = {result['rows']: result for result in baseline}
+    for result in results:
+        if result['rows'] not in previous:
+            continue
+        for section in ('calls', 'requests'):
+            for name, latency in result[section].items():
+                before = previous[result['rows']][section].get(name)
+                if before and latency['p99'] > before['p99'] * (1 + tolerance):
+                    failures.append("%d rows, %s: p99 %.2f ms is over %.2f ms of the baseline" % (
+                        result['rows'], name, latency['p99'], before['p99']))
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks the dashboard callbacks on synthetic datasets")
+    parser.add_argument('--rows', type=int, nargs='+', default=list(SIZES), help="sizes of the synthetic datasets")
+    parser.add_argument('--repeat', type=int, default=20, help="number of timed calls of every function and callback")
+    parser.add_argument('--json', help="file to write the results to")
+    parser.add_argument('--baseline', help="results of an earlier run to compare the p99 latencies with")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed growth of a p99 latency over the baseline")
+    parser.add_argument('--measure', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    #Measuring a single dataset, in the process started below
+    if args.measure:
+        print(json.dumps(measure(args.measure, args.repeat)))
+        return 0
+
+    results = []
+    for rows in args.rows:
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), '--measure', dataset_path(rows),
+                                 '--repeat', str(args.repeat)], cwd=REPO_DIR, check=True, capture_output=True,
+                                text=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+        report(results[-1])
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=1)
+    failures = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = regressions(results, json.load(f), args.tolerance)
+    for failure in failures:
+        print("FAIL: " + failure, file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
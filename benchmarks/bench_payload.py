@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ## Figure payload report
+
+# Reports the size in bytes of the figures returned by the callbacks, as plain Plotly JSON (before) and as the compact JSON
+# stored in the figure cache (after), both uncompressed and compressed with gzip and brotli as the server sends them.
+#
+#     python benchmarks/bench_payload.py [country] [city]
+
+import gzip
+import inspect
+import os
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+os.chdir(REPO_DIR)
+os.environ['ZOMATO_WARMUP'] = '0'
+
+import app  # noqa: E402
+import dataset  # noqa: E402
+from figure_cache import serialize_figure  # noqa: E402
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+#Returns the raw, gzip and brotli sizes of a JSON payload
+def payload_sizes(payload):
+    data = payload.encode()
+    return (len(data), len(gzip.compress(data)), len(brotli.compress(data)) if brotli else 0)
+
+
+def main(country='India', city='New Delhi'):
+    figures = [('update_bar_chart', (country, 10)), ('update_grouped_bar_chart', (country, 10)),
+               ('update_scatter_plot', (city, [0, 5], [], 'or', [], [])), ('update_donut_graph', (country, [5, 5])),
+               ('update_world_map', ([5, 5],))]
+
+    print("%-26s %-8s %10s %10s %10s" % ('figure', '', 'bytes', 'gzip', 'brotli'))
+    totals = {'before': [0, 0, 0], 'after': [0, 0, 0]}
+    snapshot = dataset.current()
+    for name, args in figures:
+        fig = inspect.unwrap(getattr(app, name))(snapshot, *args)
+        for label, payload in (('before', fig.to_json()), ('after', serialize_figure(fig))):
+            sizes = payload_sizes(payload)
+            totals[label] = [total + size for total, size in zip(totals[label], sizes)]
+            print("%-26s %-8s %10d %10d %10d" % ((name if label == 'before' else '', label) + sizes))
+    for label, sizes in totals.items():
+        print("%-26s %-8s %10d %10d %10d" % (('total' if label == 'before' else '', label) + tuple(sizes)))
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:3])
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ## Row index micro-benchmark
+
+# Compares selecting the restaurants of a country or a city with a boolean mask over the whole dataset against selecting
+# them through the row ranges of the sorted dataset (see dataset.build_row_ranges), on a synthetic dataset of 10M rows.
+#
+#     python benchmarks/bench_row_index.py [--rows 10000000] [--repeat 20]
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import dataset  # noqa: E402
+
+
+#Returns a synthetic dataset with 15 countries and 10 cities per country, skewed towards the first country and city
+def synthetic_dataset(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    country_weights = 1 / np.arange(1, 16) ** 2
+    country_codes = rng.choice(15, size=rows, p=country_weights / country_weights.sum())
+    city_codes = country_codes * 10 + np.minimum(rng.geometric(0.3, size=rows) - 1, 9)
+    zomato_dataset = pd.DataFrame({
+        'Country': pd.Categorical.from_codes(country_codes, categories=['Country %d' % i for i in range(15)]),
+        'City': pd.Categorical.from_codes(city_codes, categories=['City %d' % i for i in range(150)]),
+        'Average Cost for two': rng.integers(100, 5000, size=rows, dtype='int32'),
+        'Aggregate rating': rng.uniform(0, 5, size=rows).astype('float32'),
+    })
+    return dataset.sort_rows(zomato_dataset)
+
+
+#Returns the median time in milliseconds of calling the function
+def median_ms(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    return float(np.median(times))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compares boolean mask filtering with the row ranges index")
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    zomato_dataset = synthetic_dataset(args.rows)
+    start = time.perf_counter()
+    row_ranges = {column: dataset.build_row_ranges(zomato_dataset, column) for column in ('Country', 'City')}
+    print("%d rows, row ranges built in %.1f ms" % (len(zomato_dataset), (time.perf_counter() - start) * 1000))
+
+    print("%-10s %-12s %10s %12s %12s %9s" % ('column', 'value', 'rows', 'mask ms', 'ranges ms', 'speedup'))
+    for column, values in (('Country', ['Country 0', 'Country 14']), ('City', ['City 0', 'City 149'])):
+        for value in values:
+            mask_ms = median_ms(lambda: zomato_dataset[zomato_dataset[column] == value], args.repeat)
+            ranges_ms = median_ms(lambda: dataset.select_rows(zomato_dataset, row_ranges[column], value), args.repeat)
+            rows = len(dataset.select_rows(zomato_dataset, row_ranges[column], value))
+            print("%-10s %-12s %10d %12.3f %12.3f %8.0fx" % (column, value, rows, mask_ms, ranges_ms,
+                                                             mask_ms / max(ranges_ms, 1e-6)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ## Startup benchmark of the dashboard
+
+# Measures how long it takes a fresh worker to import app.py, along with the peak memory of that worker. Every run imports
+# the app in a new Python process, the same way a gunicorn worker does when it starts. The first run is not measured, as it
+# builds the dataset cache.
+#
+# The benchmark fails with a non zero exit code when the median import time or the peak memory exceed the given budgets,
+# so it can guard the startup time of the dashboard in CI:
+#
+#     python benchmarks/bench_startup.py --runs 5 --max-seconds 3 --max-rss-mb 250
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#The code run by every worker process, which prints the import time in seconds and the peak memory in MB
+IMPORT_APP = """
+import json, resource, time
+start = time.perf_counter()
+import app
+seconds = time.perf_counter() - start
+print(json.dumps({'seconds': seconds, 'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+"""
+
+
+#Imports the app in a new process and returns its import time and peak memory
+def measure_import():
+    output = subprocess.run([sys.executable, '-c', IMPORT_APP], cwd=REPO_DIR, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measures the import time and memory of app.py")
+    parser.add_argument('--runs', type=int, default=5, help="number of measured imports")
+    parser.add_argument('--max-seconds', type=float, default=None, help="budget for the median import time")
+    parser.add_argument('--max-rss-mb', type=float, default=None, help="budget for the peak memory of a worker")
+    args = parser.parse_args(argv)
+
+    measure_import()
+    results = [measure_import() for _ in range(args.runs)]
+    seconds = statistics.median(r['seconds'] for r in results)
+    rss_mb = max(r['rss_mb'] for r in results)
+    print("import app: median %.3f s, min %.3f s, max %.3f s, peak RSS %.1f MB" % (
+        seconds, min(r['seconds'] for r in results), max(r['seconds'] for r in results), rss_mb))
+
+    failures = []
+    if args.max_seconds is not None and seconds > args.max_seconds:
+        failures.append("median import time %.3f s is over the budget of %.3f s" % (seconds, args.max_seconds))
+    if args.max_rss_mb is not None and rss_mb > args.max_rss_mb:
+        failures.append("peak RSS %.1f MB is over the budget of %.1f MB" % (rss_mb, args.max_rss_mb))
+    for failure in failures:
+        print("FAIL: " + failure, file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
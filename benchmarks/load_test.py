@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ## Load test of the dashboard
+
+# Simulates concurrent users of the dashboard against a local server, to find out how many users a box can serve. Every user
+# replays sessions like the ones of a real visitor, one after the other:
+#
+# - loading the page, which fires the callbacks of the selected country
+# - picking a country, and then the callbacks fired by the city selected for that country
+# - selecting a range of ratings in the slider
+# - switching to another city of the country
+#
+# with a random think time between the steps. The throughput, the latency percentiles and the error rate are reported for
+# every Dash output id, along with the totals.
+#
+# By default the dashboard is started with gunicorn (see gunicorn.conf.py) on a free local port, and stopped at the end:
+#
+#     python benchmarks/load_test.py [--users 20] [--duration 60] [--workers 4] [--think 1.0]
+#
+# Passing --url runs the load test against a dashboard which is already running on this box instead. Only the Python
+# standard library is used to send the requests, so no external service is needed.
+
+import argparse
+import gzip
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+
+import numpy as np
+
+from bench_callbacks import REPO_DIR, VALUES, update_component_payload
+
+
+#Keeps the latencies and the errors of the requests, per Dash output id and in total
+#A request is counted once for every output id it updates, which can be listed twice (for eg. the options and the value of
+#the cities dropdown), and once in the totals
+class Stats:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+        self.requests = 0
+        self.request_errors = 0
+
+    def record(self, outputs, seconds, error):
+        with self._lock:
+            self.requests += 1
+            self.request_errors += error
+            for output in dict.fromkeys(outputs):
+                self.latencies.setdefault(output, []).append(seconds)
+                self.errors[output] = self.errors.get(output, 0) + error
+
+
+#A simulated user, sending the requests of its sessions over a single keep-alive connection
+class User:
+
+    def __init__(self, url, stats, think, seed):
+        parsed = urllib.parse.urlsplit(url)
+        self.connection = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=60)
+        self.prefix = parsed.path.rstrip('/')
+        self.stats = stats
+        self.think = think
+        self.random = random.Random(seed)
+        self.callbacks = None
+        self.countries = None
+
+    #Sends a request and returns the decoded JSON of its response, or None when it failed
+    def request(self, method, path, outputs, body=None):
+        start = time.perf_counter()
+        try:
+            self.connection.request(method, self.prefix + path, body=json.dumps(body) if body is not None else None,
+                                    headers={'Content-Type': 'application/json', 'Accept-Encoding': 'gzip'})
+            response = self.connection.getresponse()
+            data = response.read()
+            error = response.status not in (200, 204)
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            data, error = b'', True
+        self.stats.record(outputs, time.perf_counter() - start, error)
+        if error or not data:
+            return None
+        if response.getheader('Content-Encoding') == 'gzip':
+            data = gzip.decompress(data)
+        return json.loads(data) if response.getheader('Content-Type', '').startswith('application/json') else None
+
+    #Fires the callback updating the output id, as if the changed input had been changed in the browser
+    def fire(self, output_id, changed, values):
+        output, spec = next((output, spec) for output, spec in self.callbacks.items() if '%s.' % output_id in output)
+        outputs = [part.rsplit('.', 1)[0] for part in output.strip('.').split('...')]
+        return self.request('POST', '/_dash-update-component', outputs,
+                            update_component_payload(output, spec, changed, values))
+
+    def pause(self):
+        if self.think:
+            time.sleep(self.random.expovariate(1 / self.think))
+
+    #Loads the page, the way the browser does, and returns the values of the inputs of the dashboard
+    def load_page(self):
+        self.request('GET', '/', ['page'])
+        layout = self.request('GET', '/_dash-layout', ['_dash-layout'])
+        dependencies = self.request('GET', '/_dash-dependencies', ['_dash-dependencies'])
+        if layout is None or dependencies is None:
+            return None
+        self.callbacks = {dependency['output']: dependency for dependency in dependencies}
+        self.countries = [option['value'] for option in find_component(layout, 'countries_dropdown')['options']]
+        values = dict(VALUES)
+        self.fire('numOfRestCountry', 'countries_dropdown.value', values)
+        self.fire('world_map', 'slider.value', values)
+        self.fire('density_map', 'countries_dropdown.value', values)
+        self.fire('scatter_plot', 'cities_dropdown.value', values)
+        return values
+
+    #Selects the country, and then fires the callbacks of the city which the dashboard selected for it
+    #Returns the cities of the country
+    def select_country(self, values, country):
+        values['countries_dropdown.value'] = country
+        response = self.fire('numOfRestCountry', 'countries_dropdown.value', values)
+        cities = (response or {}).get('response', {}).get('cities_dropdown', {})
+        self.fire('density_map', 'countries_dropdown.value', values)
+        self.select_city(values, cities.get('value'))
+        return [option['value'] for option in cities.get('options', [])]
+
+    def select_city(self, values, city):
+        values['cities_dropdown.value'] = city
+        self.fire('numOfRestCountry', 'cities_dropdown.value', values)
+        self.fire('scatter_plot', 'cities_dropdown.value', values)
+        self.fire('density_map', 'cities_dropdown.value', values)
+
+    def move_slider(self, values, stars):
+        values['slider.value'] = stars
+        self.fire('numOfRestCountry', 'slider.value', values)
+        self.fire('world_map', 'slider.value', values)
+        self.fire('scatter_plot', 'slider.value', values)
+        self.fire('density_map', 'slider.value', values)
+
+    #Replays one session of a user
+    def session(self):
+        values = self.load_page()
+        if values is None:
+            return
+        self.pause()
+        cities = self.select_country(values, self.random.choice(self.countries))
+        self.pause()
+        lo = self.random.randint(0, 5)
+        self.move_slider(values, [lo, self.random.randint(lo, 5)])
+        self.pause()
+        if cities:
+            self.select_city(values, self.random.choice(cities))
+
+    #Replays sessions until the deadline
+    def run(self, deadline):
+        while time.monotonic() < deadline:
+            self.session()
+        self.connection.close()
+
+
+#Returns the props of the component having the id in a Dash layout
+def find_component(layout, component_id):
+    if isinstance(layout, dict):
+        props = layout.get('props', {})
+        if props.get('id') == component_id:
+            return props
+        children = props.get('children')
+        return find_component(children if isinstance(children, list) else [children], component_id)
+    if isinstance(layout, list):
+        for child in layout:
+            found = find_component(child, component_id)
+            if found is not None:
+                return found
+    return None
+
+
+#Returns a free local port
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+#Starts the dashboard with gunicorn on a local port and waits until it answers, returns the process and its url
+def start_server(workers, timeout=300):
+    port = free_port()
+    env = dict(os.environ, GUNICORN_BIND='127.0.0.1:%d' % port, GUNICORN_WORKERS=str(workers))
+    process = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:server'], cwd=REPO_DIR,
+                               env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = 'http://127.0.0.1:%d' % port
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("the server exited with code %d" % process.returncode)
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            connection.request('GET', '/_dash-layout')
+            if connection.getresponse().status == 200:
+                return process, url
+        except OSError:
+            time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError("the server did not answer within %d s" % timeout)
+
+
+#Prints the throughput, latency and errors of every output id
+def report(stats, seconds, users):
+    print("%d users for %.1f s" % (users, seconds))
+    print("%-24s %9s %9s %9s %9s %9s %9s" % ('output id', 'requests', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms', 'errors'))
+    for output, latencies in sorted(stats.latencies.items()):
+        latencies = np.array(latencies) * 1000
+        errors = stats.errors[output]
+        print("%-24s %9d %9.1f %9.1f %9.1f %9.1f %8.2f%%" % (
+            output, len(latencies), len(latencies) / seconds, np.percentile(latencies, 50), np.percentile(latencies, 95),
+            np.percentile(latencies, 99), 100 * errors / len(latencies)))
+    print("%-24s %9d %9.1f %39.2f%%" % ('total', stats.requests, stats.requests / seconds,
+                                          100 * stats.request_errors / max(stats.requests, 1)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulates concurrent users of the dashboard against a local server")
+    parser.add_argument('--users', type=int, default=20, help="number of concurrent users")
+    parser.add_argument('--duration', type=float, default=60, help="seconds during which sessions are started")
+    parser.add_argument('--think', type=float, default=1.0, help="mean think time in seconds between the steps")
+    parser.add_argument('--workers', type=int, default=4, help="number of gunicorn workers of the started server")
+    parser.add_argument('--url', help="url of a dashboard already running on this box")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    process, url = (None, args.url) if args.url else start_server(args.workers)
+    try:
+        stats = Stats()
+        start = time.monotonic()
+        users = [User(url, stats, args.think, args.seed + i) for i in range(args.users)]
+        threads = [threading.Thread(target=user.run, args=(start + args.duration,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        report(stats, time.monotonic() - start, args.users)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ## Bitmaps of the restaurants
+
+# A bitmap holds one bit per row of the dataset, set when the restaurant of that row is part of the set the bitmap stands
+# for. The bits are packed eight to a byte (numpy.packbits), so the bitmap of a 10 million rows dataset takes 1.25 MB, and sets
+# of restaurants are combined with a single vectorized AND or OR over the bytes instead of comparing whole columns again.
+#
+# The Cuisines column lists every cuisine served by a restaurant as a single string, for eg. "French, Japanese, Desserts".
+# The CuisineIndex splits it into the individual cuisines and keeps the bitmap of the restaurants serving every cuisine. Most
+# cuisines are only served by a few restaurants, so a cuisine served by less than one restaurant out of 32 is kept as the
+# sorted positions of its rows (4 bytes each) rather than as a bitmap, which is smaller.
+#
+# The FilterIndex keeps the bitmap of every value of the columns which the dashboard filters the restaurants on, so any
+# combination of filters is answered by ANDing and ORing bitmaps, and the number of restaurants by counting their bits.
+# The restaurants of a country or a city are a few ranges of rows, so when the restaurants are filtered on one, the bitmaps
+# are only combined over the bytes holding those rows.
+
+import functools
+
+import numpy as np
+import pandas as pd
+
+#Columns having a bitmap for each of their values in the FilterIndex
+FILTER_COLUMNS = ['Stars', 'Has Online delivery', 'Has Table booking', 'Price range']
+
+#A cuisine served by less than one restaurant out of SPARSE_RATIO is kept as the positions of its rows instead of a bitmap
+SPARSE_RATIO = 32
+
+#Number of bits set in every possible byte
+POPCOUNT = np.array([bin(byte).count('1') for byte in range(256)], dtype='uint8')
+
+
+#Returns the bitmap of the rows set in a boolean mask
+def from_mask(mask):
+    return np.packbits(mask)
+
+
+#Returns the bitmap of the rows found in a list of slices (see dataset.build_row_ranges) out of size rows
+def from_ranges(size, row_ranges):
+    mask = np.zeros(size, dtype=bool)
+    for rows in row_ranges:
+        mask[rows] = True
+    return from_mask(mask)
+
+
+#Returns the bitmap of the given row positions out of size rows
+def from_rows(size, rows):
+    mask = np.zeros(size, dtype=bool)
+    mask[rows] = True
+    return from_mask(mask)
+
+
+#Returns the row positions which are set in a bitmap
+def contains(bitmap, rows):
+    return rows[(bitmap[rows >> 3] >> (7 - (rows & 7)).astype('uint8')) & 1 == 1]
+
+
+#Returns the bitmap of the rows set in every one of the bitmaps
+def intersect(bitmaps):
+    return np.bitwise_and.reduce(bitmaps)
+
+
+#Returns the bitmap of the rows set in any of the bitmaps
+def union(bitmaps):
+    return np.bitwise_or.reduce(bitmaps)
+
+
+#Returns the number of rows set in a bitmap
+def count(bitmap):
+    return int(POPCOUNT[bitmap].sum(dtype='int64'))
+
+
+#Returns the positions of the rows set in a bitmap of size rows
+def rows(bitmap, size):
+    return np.flatnonzero(np.unpackbits(bitmap, count=size))
+
+
+class CuisineIndex:
+
+    #Builds the bitmap, or the sorted row positions, of the restaurants serving every cuisine listed in the Cuisines column of
+    #the dataset
+    def __init__(self, zomato_dataset):
+        self.size = len(zomato_dataset)
+        cuisines = zomato_dataset['Cuisines']
+        codes = cuisines.cat.codes.to_numpy()
+
+        #The categories of the column are the distinct lists of cuisines, every cuisine is mapped to the categories listing it
+        #A list may name the same cuisine twice, which must not list its rows twice
+        categories = {}
+        for category, listed in enumerate(cuisines.cat.categories):
+            for cuisine in {cuisine.strip() for cuisine in str(listed).split(',')}:
+                if cuisine:
+                    categories.setdefault(cuisine, []).append(category)
+
+        #Sorting the rows by category puts the restaurants of every category next to each other, so the rows serving a cuisine
+        #are gathered from the runs of its categories instead of comparing the whole column once per cuisine
+        order = np.argsort(codes, kind='stable').astype('int32')
+        bounds = np.searchsorted(codes[order], np.arange(len(cuisines.cat.categories) + 1))
+        self._bitmaps = {}
+        self._rows = {}
+        for cuisine, listing in categories.items():
+            cuisine_rows = np.concatenate([order[bounds[category]:bounds[category + 1]] for category in listing])
+            if len(cuisine_rows) * SPARSE_RATIO < self.size:
+                self._rows[cuisine] = np.sort(cuisine_rows)
+            else:
+                self._bitmaps[cuisine] = from_rows(self.size, cuisine_rows)
+        self.cuisines = sorted(categories)
+
+    #Returns the bitmap of the restaurants serving all (match='and') or any (match='or') of the given cuisines
+    #The rows of the sparse cuisines are combined before making a bitmap of them. Restaurants serving all the cuisines serve
+    #the sparse ones, so only their rows are looked up in the bitmaps of the other cuisines
+    def bitmap(self, cuisines, match='or'):
+        bitmaps = [self._bitmaps[cuisine] for cuisine in cuisines if cuisine in self._bitmaps]
+        sparse = [self._rows[cuisine] for cuisine in cuisines if cuisine in self._rows]
+        if not (bitmaps or sparse) or (match == 'and' and len(bitmaps) + len(sparse) < len(cuisines)):
+            return from_mask(np.zeros(self.size, dtype=bool))
+        if match != 'and':
+            if sparse:
+                bitmaps.append(from_rows(self.size, np.concatenate(sparse)))
+            return union(bitmaps)
+        if not sparse:
+            return intersect(bitmaps)
+        cuisine_rows = functools.reduce(lambda left, right: np.intersect1d(left, right, assume_unique=True), sparse)
+        if bitmaps:
+            cuisine_rows = contains(intersect(bitmaps), cuisine_rows)
+        return from_rows(self.size, cuisine_rows)
+
+
+class FilterIndex:
+
+    #Builds the bitmap of every value of the filter columns of the dataset
+    #The dataset is sorted by country and city, so the rows of a country or a city are not stored as bitmaps but as their row
+    #ranges (see dataset.build_row_ranges), which row_ranges maps from the column names. Their bitmaps are made when needed
+    def __init__(self, zomato_dataset, row_ranges, columns=FILTER_COLUMNS):
+        self.size = len(zomato_dataset)
+        self._row_ranges = row_ranges
+        self._bitmaps = {}
+        for column in columns:
+            values = zomato_dataset[column]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                codes = values.cat.codes.to_numpy()
+                self._bitmaps[column] = {value: from_mask(codes == code) for code, value in enumerate(values.cat.categories)}
+            else:
+                values = values.to_numpy()
+                self._bitmaps[column] = {value.item(): from_mask(values == value) for value in np.unique(values)}
+
+    #Returns the bitmap of the rows having the value in the column
+    def value_bitmap(self, column, value):
+        if column in self._row_ranges:
+            return from_ranges(self.size, self._row_ranges[column].get(value, []))
+        bitmap = self._bitmaps[column].get(value)
+        return bitmap if bitmap is not None else from_mask(np.zeros(self.size, dtype=bool))
+
+    #Returns the bitmap of the rows matching every filter, where filters maps the columns to the list of values allowed in
+    #them, which are also set in every one of the given bitmaps. A column without any value allowed is not filtered upon
+    #When a column stored as row ranges is filtered upon, the other filters and bitmaps are only combined over the bytes of
+    #its ranges, and the bits of the edge bytes outside of them are cleared, instead of making the bitmap of its ranges
+    def bitmap(self, filters, bitmaps=()):
+        filters = {column: values for column, values in filters.items() if values}
+        ranged = next((column for column in filters if column in self._row_ranges), None)
+        if ranged is None:
+            if not (filters or bitmaps):
+                return from_mask(np.ones(self.size, dtype=bool))
+            return self._combine(filters, bitmaps, slice(None))
+
+        row_ranges = [rows for value in filters.pop(ranged) for rows in self._row_ranges[ranged].get(value, [])]
+        bitmap = np.zeros((self.size + 7) // 8, dtype='uint8')
+        for rows in row_ranges:
+            if rows.start >= rows.stop:
+                continue
+            span = slice(rows.start >> 3, (rows.stop + 7) >> 3)
+            if filters or bitmaps:
+                span_bitmap = self._combine(filters, bitmaps, span)
+            else:
+                span_bitmap = np.full(span.stop - span.start, 0xFF, dtype='uint8')
+            span_bitmap[0] &= 0xFF >> (rows.start & 7)
+            if rows.stop & 7:
+                span_bitmap[-1] &= (0xFF << (8 - (rows.stop & 7))) & 0xFF
+            bitmap[span] |= span_bitmap
+        return bitmap
+
+    #Returns the bytes in the span of the bitmap of the rows matching every filter and set in every one of the bitmaps
+    def _combine(self, filters, bitmaps, span):
+        return intersect([union([self.value_bitmap(column, value)[span] for value in values])
+                          for column, values in filters.items()] + [bitmap[span] for bitmap in bitmaps])
@@ -0,0 +1,731 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ## Loading the Zomato dataset
+
+# The dashboard uses the zomato.csv file along with the Country-Code.xlsx file from the Kaggle dataset. Parsing the csv file
+# and especially the excel file is slow, so the cleaned and merged dataset is also written to a Feather file in a cache
+# directory. On the next start this file is memory mapped and read back directly, as long as the source files have not changed.
+#
+# The cache can also be built ahead of time (for eg. while building the deployment image) by running:
+#
+#     python dataset.py
+#
+# The cache file is written uncompressed in the Arrow format, so the numeric columns of the dataset are used directly from
+# the memory mapped file instead of being copied into every process. All the gunicorn workers of a server (see
+# gunicorn.conf.py) then share the same pages of the file through the page cache, and adding a worker costs little memory.
+# The search index, whose building reads the addresses from the csv file, is saved next to the cache file in the same way.
+#
+# The Average Cost for two is listed in the local currency of every country. While merging the countries, it is also converted
+# to US dollars with the rates of the currency-rates.csv file, so the costs of different countries can be compared. The rates
+# are listed by country code rather than by currency, as "Dollar($)" is used by several countries and the restaurants of the
+# Philippines are listed in "Botswana Pula(P)", which actually are Philippine pesos.
+#
+# The Rating color of a restaurant stands for its number of stars, from White (no rating) up to Dark Green (5 stars). The
+# stars are looked up once per restaurant while cleaning the dataset and kept in the Stars column, so the dashboard selects
+# a range of stars with a single comparison of small integers instead of matching the rating colors one by one.
+#
+# For csv files larger than the memory of the server, the dataset can instead be streamed in chunks (see stream_snapshot).
+# The counts are then accumulated chunk by chunk, and only the columns which the dashboard reads row by row are kept, in a
+# row store file which is memory mapped like the cache file.
+#
+# The dashboard reads the dataset, along with the restaurant counts and row ranges precomputed from it, through a Snapshot.
+# The current snapshot is replaced as a whole when the source files change (see DatasetReloader), so a callback which took
+# the current snapshot keeps seeing the same complete dataset until it returns.
+
+import hashlib
+import io
+import logging
+import os
+import shutil
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+import bitmaps
+import search
+import spatial
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.feather as feather
+except ImportError:
+    pa = pc = feather = None
+
+
+#The csv file and the cache directory can be moved through ZOMATO_CSV_FILE and ZOMATO_CACHE_DIR, for eg. to run the
+#dashboard on the synthetic datasets of the benchmarks
+ZOMATO_FILE = os.environ.get('ZOMATO_CSV_FILE', "zomato.csv")
+COUNTRY_CODE_FILE = "Country-Code.xlsx"
+RATES_FILE = "currency-rates.csv"
+CACHE_DIR = os.environ.get('ZOMATO_CACHE_DIR', ".cache")
+
+#Version of the layout of the cached dataset, which is part of the name of the cache file
+#It has to be increased whenever the way the dataset is built changes, so that older cache files are not used anymore
+CACHE_VERSION = 7
+
+logger = logging.getLogger(__name__)
+
+#Every column is loaded with a compact data type: categories for the columns having only a few distinct values, booleans
+#for the Yes/No columns and narrow numbers for the rest. The free text Address and Locality Verbose columns are not shown
+#by the dashboard, so they are not loaded into the dataset. The addresses are only read to build the search index
+zomato_dtypes = {
+    'Restaurant ID': 'int32',
+    'Restaurant Name': 'object',
+    'Country Code': 'int16',
+    'City': 'category',
+    'Locality': 'category',
+    'Longitude': 'float32',
+    'Latitude': 'float32',
+    'Cuisines': 'category',
+    'Average Cost for two': 'int32',
+    'Currency': 'category',
+    'Has Table booking': 'bool',
+    'Has Online delivery': 'bool',
+    'Is delivering now': 'bool',
+    'Switch to order menu': 'bool',
+    'Price range': 'int8',
+    'Aggregate rating': 'float32',
+    'Rating color': 'category',
+    'Rating text': 'category',
+    'Votes': 'int32',
+}
+
+
+#Columns kept for every restaurant when the dataset is streamed, which are the ones read row by row by the dashboard
+#Every other column is only needed for the counts
+row_store_columns = ['Restaurant ID', 'Restaurant Name', 'Country', 'City', 'Locality', 'Longitude', 'Latitude', 'Cuisines',
+                     'Average Cost for two', 'Cost for two (USD)', 'Has Table booking', 'Has Online delivery', 'Price range',
+                     'Aggregate rating', 'Stars', 'Votes']
+
+
+#Reads the restaurants from the csv file, or returns an iterator over chunks of chunksize restaurants
+#Encoding attribute is mentioned here as certain characters could not be read by the default encoding mechnaism
+def read_restaurants(file=ZOMATO_FILE, chunksize=None):
+    return pd.read_csv(file, encoding="ISO-8859-1", usecols=list(zomato_dtypes), dtype=zomato_dtypes,
+                       true_values=['Yes'], false_values=['No'], chunksize=chunksize)
+
+
+#Returns an iterator over chunks of chunksize Restaurant IDs along with their Address
+#The addresses are only needed to build the search index, so they are not kept in the dataset
+def read_addresses(file=ZOMATO_FILE, chunksize=1_000_000):
+    return pd.read_csv(file, encoding="ISO-8859-1", usecols=['Restaurant ID', 'Address'],
+                       dtype={'Restaurant ID': 'int32', 'Address': 'object'}, chunksize=chunksize)
+
+
+#Reads the countries along with their country codes from the excel file, and the US dollars per unit of their currency from
+#the rates file
+def read_country_codes(file=COUNTRY_CODE_FILE, rates_file=RATES_FILE):
+    rates_df = pd.read_csv(rates_file, usecols=['Country Code', 'USD per unit'],
+                           dtype={'Country Code': 'int16', 'USD per unit': 'float64'})
+    return pd.read_excel(file, dtype={'Country Code': 'int16'}).merge(rates_df, on='Country Code', how='left')
+
+
+#Adds the Country and the Cost for two (USD) columns to the restaurants and removes the Country Code column
+#Instead of copying the whole dataset with pd.merge, the country names are looked up from their codes as a categorical column
+#and the rates of their currencies by the same positions
+def merge_countries(df, contry_code_df):
+    country_positions = pd.Index(contry_code_df['Country Code']).get_indexer(df['Country Code'])
+    df['Country'] = pd.Categorical.from_codes(country_positions, categories=contry_code_df['Country'])
+    rates = np.where(country_positions >= 0, contry_code_df['USD per unit'].to_numpy()[country_positions], np.nan)
+    df['Cost for two (USD)'] = (df['Average Cost for two'].to_numpy() * rates).astype('float32')
+    df.drop(columns='Country Code', inplace=True)
+    return df
+
+
+#Replaces the missing Cuisines with "Other" to depict that these restaurants serve a different type of cuisine
+def fill_missing_values(zomato_dataset):
+    if "Other" not in zomato_dataset['Cuisines'].cat.categories:
+        zomato_dataset['Cuisines'] = zomato_dataset['Cuisines'].cat.add_categories("Other")
+    zomato_dataset['Cuisines'] = zomato_dataset['Cuisines'].fillna("Other")
+    return zomato_dataset
+
+
+#Number of stars of every Rating color
+RATING_STARS = {'White': 0, 'Red': 1, 'Orange': 2, 'Yellow': 3, 'Green': 4, 'Dark Green': 5}
+
+
+#Adds the Stars column holding the number of stars of every restaurant, or -1 for an unknown Rating color
+#The stars are looked up once per category of the Rating color column, and then for every restaurant by its category code
+def add_stars(zomato_dataset):
+    colors = zomato_dataset['Rating color']
+    stars = np.array([RATING_STARS.get(color, -1) for color in colors.cat.categories] + [-1], dtype='int8')
+    zomato_dataset['Stars'] = stars[colors.cat.codes.to_numpy()]
+    return zomato_dataset
+
+
+#Merges the countries into the restaurants and cleans them
+def clean_restaurants(df, contry_code_df):
+    return add_stars(fill_missing_values(merge_countries(df, contry_code_df)))
+
+
+#Sorts the restaurants by country and city, so that the restaurants of a country or a city are stored next to each other
+#The cities are kept in the order in which they are first listed in the dataset
+def sort_rows(zomato_dataset):
+    city = zomato_dataset['City'].cat.remove_unused_categories()
+    zomato_dataset['City'] = city.cat.reorder_categories(list(city.dropna().unique()))
+    return zomato_dataset.sort_values(['Country', 'City'], kind='stable', ignore_index=True)
+
+
+#Parses the source files and returns the cleaned and merged dataset
+def build_dataset(file=ZOMATO_FILE, country_file=COUNTRY_CODE_FILE):
+    return sort_rows(clean_restaurants(read_restaurants(file), read_country_codes(country_file)))
+
+
+#Returns the row ranges of every value of a categorical column, as a dict of lists of slices
+#As the dataset is sorted by country and city, a country is a single range of rows and a city is a single range in every
+#country it is listed in, so selecting the restaurants of a country or a city does not need to scan the whole dataset
+def build_row_ranges(zomato_dataset, column):
+    values = zomato_dataset[column]
+    codes = values.cat.codes.to_numpy()
+    if not len(codes):
+        return {}
+    starts = np.flatnonzero(np.concatenate(([True], codes[1:] != codes[:-1])))
+    stops = np.append(starts[1:], len(codes))
+    row_ranges = {}
+    for start, stop in zip(starts, stops):
+        if codes[start] >= 0:
+            row_ranges.setdefault(values.cat.categories[codes[start]], []).append(slice(start, stop))
+    return row_ranges
+
+
+#Returns the restaurants stored in the row ranges of a value, or no restaurants when the value has no rows
+#When columns are given only those columns are taken (see take_rows)
+def select_rows(zomato_dataset, row_ranges, value, columns=None):
+    ranges = row_ranges.get(value, [])
+    if columns is not None:
+        rows = ranges[0] if len(ranges) == 1 else np.r_[tuple(ranges)] if ranges else slice(0, 0)
+        return take_rows(zomato_dataset, rows, columns)
+    if len(ranges) == 1:
+        return zomato_dataset.iloc[ranges[0]]
+    if not ranges:
+        return zomato_dataset.iloc[:0]
+    return pd.concat([zomato_dataset.iloc[rows] for rows in ranges])
+
+
+#Returns the columns of the restaurants at the row positions, which can also be a slice of rows
+#Only the columns are selected, as selecting rows of the whole dataset would copy every column out of the memory mapped cache
+#file
+def take_rows(zomato_dataset, rows, columns):
+    return pd.DataFrame({column: zomato_dataset[column].array[rows] for column in columns})
+
+
+#Returns the cities of every country, in the order in which they are stored in the sorted dataset
+def build_city_options(zomato_dataset):
+    countries = zomato_dataset['Country']
+    cities = zomato_dataset['City']
+    country_codes = countries.cat.codes.to_numpy()
+    city_codes = cities.cat.codes.to_numpy()
+    changes = (country_codes[1:] != country_codes[:-1]) | (city_codes[1:] != city_codes[:-1])
+    city_options = {}
+    starts = np.flatnonzero(np.concatenate(([True], changes))) if len(city_codes) else []
+    for start in starts:
+        if country_codes[start] >= 0 and city_codes[start] >= 0:
+            city_options.setdefault(countries.cat.categories[country_codes[start]], []).append(
+                cities.cat.categories[city_codes[start]])
+    return city_options
+
+
+#Columns by which the restaurants are counted for the dashboard, by the name of the counts
+#   city: restaurants per city, used by the bar chart
+#   city_delivery: restaurants per city having and not having online delivery, used by the grouped bar chart
+#   rating_city: restaurants per number of stars and city, used by the donut graph
+#   country_rating: restaurants per number of stars and country, used by the world map
+#   country / city_total: total number of restaurants per country and per city, used by the cards
+COUNTS = {
+    'city': ['Country', 'City'],
+    'city_delivery': ['Country', 'City', 'Has Online delivery'],
+    'rating_city': ['Country', 'Stars', 'City'],
+    'country_rating': ['Stars', 'Country'],
+    'country': ['Country'],
+    'city_total': ['City'],
+}
+
+
+#Quantiles of the Cost for two (USD) which are precomputed per country, per city and per country and number of stars
+COST_QUANTILES = {'min': 0, 'q1': 0.25, 'median': 0.5, 'q3': 0.75, 'max': 1}
+COST_STATS = {
+    'country': ['Country'],
+    'city': ['Country', 'City'],
+    'country_rating': ['Country', 'Stars'],
+}
+
+
+#Returns the number of restaurants per value of the columns, sorted by the values
+#Only the observed combinations are counted, otherwise grouping by categories would count every possible combination. The
+#categories are stored as plain values, so that counts of datasets having different categories add up, while the Stars stay
+#integers so that a range of stars is selected by comparing them
+def _count(zomato_dataset, columns):
+    counts = zomato_dataset.groupby(columns, observed=True).size()
+    if isinstance(counts.index, pd.MultiIndex):
+        counts.index = pd.MultiIndex.from_arrays([_plain_values(counts.index.get_level_values(level))
+                                                  for level in range(counts.index.nlevels)], names=columns)
+    else:
+        counts.index = _plain_values(counts.index)
+    return counts.sort_index()
+
+
+def _plain_values(index):
+    return index if pd.api.types.is_integer_dtype(index.dtype) else index.astype(object)
+
+
+#Returns all the counts used by the dashboard
+def count_restaurants(zomato_dataset):
+    return {name: _count(zomato_dataset, columns) for name, columns in COUNTS.items()}
+
+
+#Returns the COST_QUANTILES of the Cost for two (USD) of the restaurants along with their number and mean cost, for each of
+#the COST_STATS. Restaurants of the countries missing from the rates file are left out
+#Only the columns are selected, as filtering the whole dataset would copy it out of the memory mapped cache file
+def cost_stats(zomato_dataset):
+    priced = zomato_dataset['Cost for two (USD)'].notna().to_numpy()
+    cost = zomato_dataset['Cost for two (USD)'][priced]
+    stats = {}
+    for name, columns in COST_STATS.items():
+        costs = cost.groupby([zomato_dataset[column][priced] for column in columns], observed=True)
+        quantiles = costs.quantile(list(COST_QUANTILES.values())).unstack()
+        quantiles.columns = list(COST_QUANTILES)
+        stats[name] = quantiles.assign(mean=costs.mean(), count=costs.size())
+    return stats
+
+
+#Returns the counts updated for the removed and added restaurants, without counting the whole dataset again
+def update_counts(counts, removed, added):
+    updated = {}
+    for name, columns in COUNTS.items():
+        total = counts[name]
+        if len(added):
+            total = total.add(_count(added, columns), fill_value=0)
+        if len(removed):
+            total = total.sub(_count(removed, columns), fill_value=0)
+        updated[name] = total[total > 0].astype('int64').sort_index()
+    return updated
+
+
+#Largest number of cities which the dashboard ranks for a country
+TOP_CITIES = 25
+
+
+#Returns the TOP_CITIES cities of every country having the most restaurants, most first, along with the number of their
+#restaurants having (Yes) and not having (No) online delivery. They are built from the counts, so they are also up to date
+#after the counts have been updated incrementally
+def build_top_cities(counts, limit=TOP_CITIES):
+    delivery = counts['city_delivery'].unstack('Has Online delivery', fill_value=0)
+    delivery = delivery.reindex(columns=[True, False], fill_value=0).set_axis(['Yes', 'No'], axis=1)
+    top_cities = counts['city'].rename('count').reset_index().join(delivery, on=['Country', 'City'])
+    top_cities[['Yes', 'No']] = top_cities[['Yes', 'No']].fillna(0).astype('int64')
+    top_cities = top_cities.sort_values(['Country', 'count'], ascending=[True, False], kind='stable')
+    return {country: cities.head(limit).drop(columns='Country').reset_index(drop=True)
+            for country, cities in top_cities.groupby('Country', sort=False)}
+
+
+#Returns the n cities of the country having the most restaurants, or no cities when the country has no restaurants
+def select_top_cities(top_cities, country, n):
+    if country not in top_cities:
+        return pd.DataFrame({'City': [], 'count': [], 'Yes': [], 'No': []})
+    return top_cities[country].head(n)
+
+
+#Concatenates datasets, keeping the categorical columns categorical even when their categories differ
+def concat_datasets(frames):
+    columns = {}
+    for column in frames[0].columns:
+        if isinstance(frames[0][column].dtype, pd.CategoricalDtype):
+            columns[column] = union_categoricals([frame[column] for frame in frames], ignore_order=True)
+        else:
+            columns[column] = np.concatenate([frame[column].to_numpy() for frame in frames])
+    return pd.DataFrame(columns)
+
+
+class Snapshot:
+
+    #The dataset along with everything the dashboard precomputes from it
+    #version identifies the source files the dataset was loaded from, and counts can be passed when they have been updated
+    #incrementally instead of counting the whole dataset again
+    #search_index is the search index of the dataset (see load_search_index), which is built over the Restaurant Name and
+    #Locality alone when it is not given
+    def __init__(self, zomato_dataset, version, counts=None, search_index=None):
+        self.zomato_dataset = zomato_dataset
+        self.version = version
+        self.counts = counts if counts is not None else count_restaurants(zomato_dataset)
+        self.country_totals = self.counts['country'].to_dict()
+        self.top_cities = build_top_cities(self.counts)
+        self.city_totals = self.counts['city_total'].to_dict()
+        self.country_rows = build_row_ranges(zomato_dataset, 'Country')
+        self.city_rows = build_row_ranges(zomato_dataset, 'City')
+        self.city_options = build_city_options(zomato_dataset)
+        self.grid = spatial.GridIndex(zomato_dataset)
+        self.nearest = spatial.NearestIndex(zomato_dataset)
+        self.cuisines = bitmaps.CuisineIndex(zomato_dataset)
+        self.search = search_index if search_index is not None else search.SearchIndex(zomato_dataset)
+        self.filters = bitmaps.FilterIndex(zomato_dataset, {'Country': self.country_rows, 'City': self.city_rows})
+        self.cost_stats = cost_stats(zomato_dataset)
+
+
+_snapshot = None
+
+
+#Returns the current snapshot of the dataset
+def current():
+    return _snapshot
+
+
+#Makes the snapshot the current one
+#Replacing the reference is atomic, so callbacks see either the previous snapshot or this one but never a partial one
+def publish(snapshot):
+    global _snapshot
+    _snapshot = snapshot
+    return snapshot
+
+
+#Returns a fingerprint of a source file, made from its contents along with its size and modification time
+def file_fingerprint(path):
+    stat = os.stat(path)
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return '%s:%d:%d' % (digest.hexdigest(), stat.st_size, stat.st_mtime_ns)
+
+
+#Returns the version of the dataset built from the given source files
+#It is derived from the fingerprints of the source files and the rates file, so any change to them results in a new version
+def dataset_version(file=ZOMATO_FILE, country_file=COUNTRY_CODE_FILE, rates_file=RATES_FILE):
+    key = hashlib.sha256(b'%d' % CACHE_VERSION)
+    for path in (file, country_file, rates_file):
+        key.update(file_fingerprint(path).encode())
+    return key.hexdigest()[:16]
+
+
+#Returns the path of the cache file of a version of the dataset
+def cache_path(version, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, 'zomato-%s.feather' % version)
+
+
+#Writes the dataset to the cache file and removes the cache files of older versions of the source files
+#The file is first written under a temporary name and then renamed, so other processes never read a half written file
+#The dataset is written as a single record batch, as a column split into several batches (by default of 64K rows each) is
+#concatenated into a copy when it is read back
+def write_cache(zomato_dataset, path):
+    cache_dir = os.path.dirname(path) or '.'
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = '%s.%d.tmp' % (path, os.getpid())
+    feather.write_feather(zomato_dataset, tmp_path, compression='uncompressed', chunksize=max(len(zomato_dataset), 1))
+    os.replace(tmp_path, path)
+    for name in os.listdir(cache_dir):
+        if name.startswith('zomato-') and name.endswith('.feather') and name != os.path.basename(path):
+            os.remove(os.path.join(cache_dir, name))
+
+
+#Reads the dataset back from the memory mapped cache file
+#With split_blocks every column is converted on its own, so that the numeric columns (which have no missing values) are
+#read-only views of the memory mapped file instead of copies. The text and boolean columns still have to be converted
+def read_cache(path):
+    return feather.read_table(path, memory_map=True).to_pandas(split_blocks=True)
+
+
+#Builds the cache file for the current source files along with its search index, unless they have already been built, and
+#returns the path of the cache file
+def build_cache(file=ZOMATO_FILE, country_file=COUNTRY_CODE_FILE, cache_dir=CACHE_DIR):
+    version = dataset_version(file, country_file)
+    path = cache_path(version, cache_dir)
+    if not os.path.exists(path):
+        write_cache(build_dataset(file, country_file), path)
+    load_search_index(read_cache(path), version, file, cache_dir)
+    return path
+
+
+#Returns the path of the saved search index of a dataset of a version
+#The index refers to the restaurants by their rows, so the path also depends upon the order of the restaurants, which
+#differs for eg. between a dataset built from the csv file and one updated incrementally by the DatasetReloader
+def search_index_path(zomato_dataset, version, cache_dir=CACHE_DIR):
+    rows = hashlib.sha256(zomato_dataset['Restaurant ID'].to_numpy().tobytes()).hexdigest()[:16]
+    return os.path.join(cache_dir, 'zomato-%s-%s.search' % (version, rows))
+
+
+#Returns the search index of the dataset over the Restaurant Name, Locality and Address of the restaurants
+#The index is memory mapped from the cache directory when it has already been saved there. Otherwise it is built by build,
+#or from the addresses read from the csv file by default, and it is saved for the other workers and the next start. The
+#indexes saved for other versions of the source files are removed
+def load_search_index(zomato_dataset, version, file=ZOMATO_FILE, cache_dir=CACHE_DIR, chunksize=1_000_000, build=None):
+    path = search_index_path(zomato_dataset, version, cache_dir)
+    if os.path.exists(path):
+        return search.SearchIndex.load(path)
+    if build is not None:
+        search_index = build()
+    else:
+        search_index = search.SearchIndex(zomato_dataset, read_addresses(file, chunksize))
+    os.makedirs(cache_dir, exist_ok=True)
+    search_index.save(path)
+    for name in os.listdir(cache_dir):
+        if name.startswith('zomato-') and name.endswith('.search') and not name.startswith('zomato-%s-' % version):
+            shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+    return search_index
+
+
+#Returns the cleaned and merged dataset, from the cache file when it is up to date and from the source files otherwise
+#Without pyarrow installed the cache is not used and the source files are always parsed
+def load_dataset(file=ZOMATO_FILE, country_file=COUNTRY_CODE_FILE, cache_dir=CACHE_DIR, version=None):
+    if feather is None:
+        return build_dataset(file, country_file)
+    path = cache_path(version or dataset_version(file, country_file), cache_dir)
+    if os.path.exists(path):
+        return read_cache(path)
+    zomato_dataset = build_dataset(file, country_file)
+    write_cache(zomato_dataset, path)
+    return zomato_dataset
+
+
+#Loads the dataset and makes it the current snapshot
+#When chunksize is given the csv file is streamed in chunks of that many restaurants (see stream_snapshot)
+def load_snapshot(file=ZOMATO_FILE, country_file=COUNTRY_CODE_FILE, cache_dir=CACHE_DIR, chunksize=None):
+    version = dataset_version(file, country_file)
+    if chunksize:
+        return publish(stream_snapshot(file, country_file, chunksize, version, cache_dir))
+    zomato_dataset = load_dataset(file, country_file, cache_dir, version)
+    search_index = load_search_index(zomato_dataset, version, file, cache_dir)
+    return publish(Snapshot(zomato_dataset, version, search_index=search_index))
+
+
+#Returns the path of the row store of a version of the dataset streamed in chunks
+def row_store_path(version, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, 'zomato-%s.rows' % version)
+
+
+#Streams the csv file in chunks of chunksize restaurants and returns the snapshot built from them, without ever holding the
+#complete raw dataset in memory. Every chunk is merged with the countries and cleaned on its own, its restaurants are added
+#to the counts and only the row_store_columns of the chunk are kept
+#With pyarrow installed the kept columns are written chunk by chunk to a file, which is then sorted column by column into
+#the row store of the cache directory (see write_row_store) and memory mapped like the cache file, so the streamed dataset
+#is not held in memory either. Without pyarrow the kept columns are concatenated and sorted in memory
+#The search index of the streamed dataset is saved to the cache directory as well
+def stream_snapshot(file=ZOMATO_FILE, country_file=COUNTRY_CODE_FILE, chunksize=1_000_000, version=None,
+                    cache_dir=CACHE_DIR):
+    version = version or dataset_version(file, country_file)
+    contry_code_df = read_country_codes(country_file)
+    path = row_store_path(version, cache_dir)
+    stored = feather is not None and os.path.exists(path)
+    unsorted_path = '%s.%d.unsorted' % (path, os.getpid())
+    counts, categories, row_store, writer = None, {}, [], None
+    try:
+        for chunk in read_restaurants(file, chunksize=chunksize):
+            chunk = clean_restaurants(chunk, contry_code_df)
+            counts = count_restaurants(chunk) if counts is None else update_counts(counts, chunk.iloc[:0], chunk)
+            if stored:
+                continue
+            chunk = chunk[row_store_columns]
+            if feather is None:
+                row_store.append(chunk)
+                continue
+
+            #The categories of every chunk differ, so the categorical columns are written as plain strings until the
+            #categories of the whole dataset are known, in the order in which they are first listed like union_categoricals
+            for column in chunk.columns[chunk.dtypes == 'category']:
+                listed = chunk[column].cat.categories
+                known = categories.get(column, listed[:0])
+                categories[column] = known.append(listed[~listed.isin(known)])
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            table = table.cast(pa.schema([field.with_type(field.type.value_type if pa.types.is_dictionary(field.type)
+                                                          else field.type) for field in table.schema]))
+            if writer is None:
+                os.makedirs(cache_dir, exist_ok=True)
+                writer = pa.ipc.new_file(unsorted_path, table.schema)
+            writer.write_table(table)
+        if writer is not None:
+            writer.close()
+            write_row_store(unsorted_path, path, categories)
+    finally:
+        if os.path.exists(unsorted_path):
+            os.remove(unsorted_path)
+
+    if counts is None:
+        return Snapshot(build_dataset(file, country_file)[row_store_columns], version)
+    if feather is not None:
+        zomato_dataset = read_row_store(path)
+    else:
+        zomato_dataset = concat_datasets(row_store)
+        del row_store[:]
+        zomato_dataset = sort_rows(zomato_dataset)
+    return Snapshot(zomato_dataset, version, counts, load_search_index(zomato_dataset, version, file, cache_dir, chunksize))
+
+
+#Sorts the rows of the unsorted file written by stream_snapshot into the row store directory, one column at a time
+#The rows are sorted as by sort_rows, from the country and city of every row alone. The plain strings of the categorical
+#columns are encoded again with the categories of the whole dataset. Every column is written to a Feather file of its own
+#as a single record batch, so it is memory mapped as a whole when read back (see write_cache)
+#The row store is first written to a temporary directory which is then renamed, and the row stores of other versions of the
+#source files are removed
+def write_row_store(unsorted_path, path, categories):
+    unsorted = feather.read_table(unsorted_path, memory_map=True)
+
+    def codes(column):
+        value_set = pa.array(list(categories[column]), pa.string())
+        return pc.index_in(unsorted[column], value_set=value_set).fill_null(-1).to_numpy()
+    keys = pd.DataFrame({column: pd.Categorical.from_codes(codes(column), categories[column])
+                         for column in ['Country', 'City']})
+    keys = sort_rows(keys.assign(row=np.arange(len(keys))))
+    order = keys['row'].to_numpy()
+
+    tmp_path = '%s.%d.tmp' % (path, os.getpid())
+    os.makedirs(tmp_path, exist_ok=True)
+    for position, column in enumerate(unsorted.column_names):
+        if column in keys:
+            values = keys.pop(column)
+            array = pa.DictionaryArray.from_arrays(pa.array(values.cat.codes.to_numpy(), mask=values.isna().to_numpy()),
+                                                   pa.array(list(values.cat.categories), pa.string()))
+        elif column in categories:
+            sorted_codes = codes(column)[order]
+            array = pa.DictionaryArray.from_arrays(pa.array(sorted_codes, mask=sorted_codes < 0),
+                                                   pa.array(list(categories[column]), pa.string()))
+        else:
+            array = unsorted[column].take(order).combine_chunks()
+        feather.write_feather(pa.table({column: array}), os.path.join(tmp_path, '%d.feather' % position),
+                              compression='uncompressed', chunksize=max(len(array), 1))
+    try:
+        os.rename(tmp_path, path)
+    except OSError:
+        #Another process has written the same row store meanwhile
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    cache_dir = os.path.dirname(path) or '.'
+    for name in os.listdir(cache_dir):
+        if name.startswith('zomato-') and name.endswith('.rows') and name != os.path.basename(path):
+            shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+
+
+#Reads the dataset back from the memory mapped files of the row store, the same way as the cache file (see read_cache)
+def read_row_store(path):
+    columns = [feather.read_table(os.path.join(path, '%d.feather' % position), memory_map=True)
+               for position in range(len(os.listdir(path)))]
+    return pa.Table.from_arrays([table.column(0) for table in columns],
+                                names=[table.column_names[0] for table in columns]).to_pandas(split_blocks=True)
+
+
+#Returns the size, modification time and last bytes of a file, used to find out how it has changed
+def _file_state(path, tail_size=4096):
+    stat = os.stat(path)
+    with open(path, 'rb') as f:
+        f.seek(max(stat.st_size - tail_size, 0))
+        tail = f.read()
+    return stat.st_size, stat.st_mtime_ns, tail
+
+
+#Returns the header of the csv file followed by the rows which have been appended after the given offset, as a csv file of
+#their own
+def read_appended_rows(file, offset):
+    with open(file, 'rb') as f:
+        header = f.readline()
+        f.seek(offset)
+        return header + f.read()
+
+
+#Returns the restaurants of the new dataset which are new or have changed, and the restaurants of the old dataset which have
+#been removed or changed, by comparing a hash of every row under its Restaurant ID
+def diff_datasets(old, new):
+    old_hashes = pd.Series(pd.util.hash_pandas_object(old, index=False).to_numpy(), index=old['Restaurant ID'].to_numpy())
+    new_hashes = pd.Series(pd.util.hash_pandas_object(new[old.columns], index=False).to_numpy(),
+                           index=new['Restaurant ID'].to_numpy())
+    added_ids = new_hashes.index[(old_hashes.reindex(new_hashes.index) != new_hashes).to_numpy()]
+    removed_ids = old_hashes.index[(new_hashes.reindex(old_hashes.index) != old_hashes).to_numpy()]
+    return old[old['Restaurant ID'].isin(removed_ids)], new[new['Restaurant ID'].isin(added_ids)]
+
+
+class DatasetReloader(threading.Thread):
+
+    #Background thread watching the source files of the dataset and publishing a new snapshot when they change
+    #
+    #When rows have only been appended to the csv file, only the appended bytes are parsed. Otherwise the csv file is parsed
+    #again and compared with the current dataset on Restaurant ID. Either way only the new, changed and removed restaurants
+    #are applied to the counts and the search index of the current snapshot. A change to the excel file changes the countries
+    #of every restaurant, so the whole dataset is built again in that case. A streamed dataset only keeps the row store,
+    #which is not enough to take changed restaurants out of the counts, so it is always streamed again.
+    #
+    #on_reload is called with every new snapshot once it has been published, for eg. to clear the figure cache
+    def __init__(self, interval, file=ZOMATO_FILE, country_file=COUNTRY_CODE_FILE, on_reload=None, chunksize=None):
+        super().__init__(name='dataset-reloader', daemon=True)
+        self.interval = interval
+        self.file = file
+        self.country_file = country_file
+        self.on_reload = on_reload
+        self.chunksize = chunksize
+        self._file_state = _file_state(file)
+        self._country_file_state = _file_state(country_file)
+        self._contry_code_df = None
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.check()
+            except Exception:
+                logger.exception("Reloading the dataset failed")
+
+    def stop(self):
+        self._stopped.set()
+
+    #Publishes a new snapshot if the source files have changed since the last check
+    def check(self):
+        file_state = _file_state(self.file)
+        country_file_state = _file_state(self.country_file)
+        if file_state == self._file_state and country_file_state == self._country_file_state:
+            return None
+
+        snapshot = current()
+        version = dataset_version(self.file, self.country_file)
+        if self.chunksize:
+            snapshot = stream_snapshot(self.file, self.country_file, self.chunksize, version)
+        elif country_file_state != self._country_file_state:
+            self._contry_code_df = None
+            zomato_dataset = build_dataset(self.file, self.country_file)
+            snapshot = Snapshot(zomato_dataset, version, search_index=load_search_index(zomato_dataset, version, self.file))
+        else:
+            previous = snapshot
+            removed, added, addresses = self._delta(previous.zomato_dataset, file_state)
+            kept = previous.zomato_dataset[~previous.zomato_dataset['Restaurant ID'].isin(removed['Restaurant ID'])]
+            zomato_dataset = sort_rows(concat_datasets([kept, added]))
+            search_index = load_search_index(zomato_dataset, version, self.file, build=lambda: search.SearchIndex.updated(
+                previous.search, zomato_dataset, added, addresses))
+            snapshot = Snapshot(zomato_dataset, version, update_counts(previous.counts, removed, added), search_index)
+            logger.info("Reloaded the dataset: %d restaurants removed or changed, %d added or changed",
+                        len(removed), len(added))
+
+        self._file_state = file_state
+        self._country_file_state = country_file_state
+        publish(snapshot)
+        if self.on_reload is not None:
+            self.on_reload(snapshot)
+        return snapshot
+
+    #Returns the removed and the added restaurants of the csv file since the last check, along with the chunks of addresses
+    #holding the ones of the added restaurants. Only the appended rows are read when rows have only been appended
+    def _delta(self, zomato_dataset, file_state):
+        if self._contry_code_df is None:
+            self._contry_code_df = read_country_codes(self.country_file)
+        old_size, _, old_tail = self._file_state
+        size, _, tail = file_state
+        appended = (size > old_size and old_tail.endswith(b'\n') and
+                    _read_range(self.file, old_size - len(old_tail), old_size) == old_tail)
+        if appended:
+            rows = read_appended_rows(self.file, old_size)
+            added = clean_restaurants(read_restaurants(io.BytesIO(rows)), self._contry_code_df)
+            removed = zomato_dataset[zomato_dataset['Restaurant ID'].isin(added['Restaurant ID'])]
+            return removed, added, read_addresses(io.BytesIO(rows))
+        new = clean_restaurants(read_restaurants(self.file), self._contry_code_df)
+        return diff_datasets(zomato_dataset, new) + (read_addresses(self.file),)
+
+
+#Returns the bytes of a file between the two offsets
+def _read_range(path, start, stop):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        return f.read(stop - start)
+
+
+#Builds the cache file ahead of time
+if __name__ == '__main__':
+    if feather is None:
+        sys.exit("pyarrow is required to build the dataset cache")
+    print(build_cache())
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ## Server side cache of the dashboard figures
+
+# The figures drawn by the callbacks of the dashboard only depend upon the values selected in the dropdowns and the slider.
+# Instead of building the same Plotly figure again for every request, the figure is serialized to JSON once and kept in this
+# cache under the callback inputs. Popular selections like India / New Delhi are then answered without building anything.
+#
+# The cache holds a bounded number of figures and evicts the least recently used one when it is full. The figures are also
+# cached under the version of the dataset they were drawn from, so a figure of an older dataset is never returned after the
+# dataset has been reloaded. The cache can then be cleared to free the memory held by the older figures.
+#
+# The figures are serialized compactly: the template data of the trace types which the figure does not use is left out, and
+# the floating point numbers of the traces are rounded, as the full float64 precision is never visible on a chart.
+#
+# When several requests ask for the same figure while it is being built, only the first one builds it and the others wait for
+# its result, instead of every one of them building the same figure at the same time.
+#
+# The cached figures can also be saved to a file and loaded back, so that figures prerendered ahead of time (see warmup.py)
+# are available from the very first request.
+
+import functools
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from plotly.io.json import to_json_plotly
+
+import metrics
+
+#Number of decimals kept for the floating point numbers of the traces
+FLOAT_DECIMALS = 4
+
+
+#Rounds every floating point number found in the (nested) value
+def _round_floats(value, decimals):
+    if isinstance(value, dict):
+        return {key: _round_floats(item, decimals) for key, item in value.items()}
+    if isinstance(value, np.ndarray):
+        return value.round(decimals) if value.dtype.kind == 'f' else value
+    if isinstance(value, (list, tuple)):
+        return [_round_floats(item, decimals) for item in value]
+    if isinstance(value, float):
+        return round(value, decimals)
+    return value
+
+
+#Returns the compact JSON of a figure
+#Plotly Express puts the defaults of every trace type in the template of the figure, only the ones used are kept
+def serialize_figure(fig, decimals=FLOAT_DECIMALS):
+    figure = fig.to_dict()
+    template = figure['layout'].get('template')
+    if template and 'data' in template:
+        trace_types = {trace.get('type', 'scatter') for trace in figure['data']}
+        template['data'] = {trace_type: traces for trace_type, traces in template['data'].items() if trace_type in trace_types}
+    figure['data'] = _round_floats(figure['data'], decimals)
+    return to_json_plotly(figure)
+
+
+class FigureCache:
+
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._figures = OrderedDict()
+        self._building = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._figures)
+
+    #Returns the key under which the figure drawn by the named function for the given arguments, from the given version of
+    #the data, is cached. The arguments are the callback inputs, so they are strings, numbers or lists of them
+    def key(self, name, args, version=None):
+        key = (name,) + tuple(tuple(arg) if isinstance(arg, list) else arg for arg in args)
+        return key if version is None else (version,) + key
+
+    #Returns the JSON of the figure cached under the key, or None when it is not cached
+    def get(self, key):
+        with self._lock:
+            figure_json = self._figures.get(key)
+            if figure_json is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._figures.move_to_end(key)
+            return figure_json
+
+    #Caches the JSON of a figure under the key, evicting the least recently used figures when the cache is full
+    def put(self, key, figure_json):
+        with self._lock:
+            self._figures[key] = figure_json
+            self._figures.move_to_end(key)
+            while len(self._figures) > self.maxsize:
+                self._figures.popitem(last=False)
+
+    #Removes every cached figure, for eg. after the dataset has been reloaded
+    def clear(self):
+        with self._lock:
+            self._figures.clear()
+
+    #Returns the hit and miss counters along with the size of the cache
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._figures), 'maxsize': self.maxsize}
+
+    #Writes every cached figure to a JSON file
+    #The file is first written under a temporary name and then renamed, so it is never read half written
+    def save(self, path):
+        with self._lock:
+            figures = [[list(key), figure_json] for key, figure_json in self._figures.items()]
+        tmp_path = '%s.%d.tmp' % (path, os.getpid())
+        with open(tmp_path, 'w') as f:
+            json.dump(figures, f)
+        os.replace(tmp_path, path)
+
+    #Adds the figures saved in a JSON file to the cache
+    def load(self, path):
+        with open(path) as f:
+            figures = json.load(f)
+        for key, figure_json in figures:
+            self.put(tuple(tuple(part) if isinstance(part, list) else part for part in key), figure_json)
+
+    #Returns the JSON of the figure cached under the key, building it with build when it is not cached
+    #Only one thread builds a figure at a time, the other threads asking for it meanwhile wait for it to be built
+    def get_or_build(self, key, build):
+        figure_json = self.get(key)
+        while figure_json is None:
+            with self._lock:
+                figure_json = self._figures.get(key)
+                if figure_json is not None:
+                    break
+                building = self._building.get(key)
+                owner = building is None
+                if owner:
+                    building = self._building[key] = threading.Event()
+            if owner:
+                try:
+                    with metrics.phase('figure'):
+                        fig = build()
+                    with metrics.phase('serialize'):
+                        figure_json = serialize_figure(fig)
+                    self.put(key, figure_json)
+                finally:
+                    with self._lock:
+                        del self._building[key]
+                    building.set()
+            else:
+                #The figure is looked up again once built, and built here if building it failed or it was already evicted
+                building.wait()
+                figure_json = self.get(key)
+        return figure_json
+
+    #Decorator caching the figures returned by a function under its name and arguments
+    #The first argument of the function is the snapshot of the dataset which the figure is drawn from (see dataset.Snapshot),
+    #so the figure is cached under the version of that same snapshot
+    def memoize(self, func):
+        @functools.wraps(func)
+        def wrapper(snapshot, *args):
+            figure_json = self.get_or_build(self.key(func.__name__, args, snapshot.version), lambda: func(snapshot, *args))
+            with metrics.phase('decode'):
+                return json.loads(figure_json)
+        return wrapper
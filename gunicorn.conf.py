@@ -0,0 +1,42 @@
+# Gunicorn settings for serving the dashboard in production:
+#
+#     gunicorn app:server
+#
+# The app is not preloaded in the master process, as forked workers would still end up with their own copy of the pandas
+# objects as soon as Python touches their reference counts. Instead the master builds the dataset cache once before starting
+# the workers, and every worker memory maps that same file (see dataset.py), so the dataset is shared by all of them.
+#
+# With ZOMATO_WARMUP=1 the figures are likewise rendered only once before starting the workers, into
+# ZOMATO_FIGURE_CACHE_FILE (see warmup.py), and every worker loads them from that file instead of rendering all of them.
+
+import os
+import subprocess
+import sys
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8050')
+workers = int(os.environ.get('GUNICORN_WORKERS', 4))
+preload_app = False
+
+
+#Builds the dataset cache in the master process, before any worker is started, and renders the figures ahead of time
+#A dataset streamed in chunks (ZOMATO_STREAM_CHUNKSIZE) is not cached, and building the cache would load the whole csv file
+def on_starting(server):
+    import dataset
+    if not int(os.environ.get('ZOMATO_STREAM_CHUNKSIZE', 0)):
+        server.log.info("Dataset cache: %s", dataset.build_cache())
+    if os.environ.get('ZOMATO_WARMUP') == '1':
+        warm_up(server)
+
+
+#Renders the figures into ZOMATO_FIGURE_CACHE_FILE, by default a file of the cache directory named after the version of
+#the dataset. They are rendered by a separate process, so the master does not hold the dataset and the figures itself
+#The workers are forked from the master, so they inherit ZOMATO_WARMUP=0 and only load the file
+def warm_up(server):
+    import dataset
+    path = os.environ.get('ZOMATO_FIGURE_CACHE_FILE')
+    if not path:
+        os.makedirs(dataset.CACHE_DIR, exist_ok=True)
+        path = os.path.join(dataset.CACHE_DIR, 'figures-%s.json' % dataset.dataset_version())
+    subprocess.run([sys.executable, '-m', 'warmup', path], check=True)
+    os.environ.update({'ZOMATO_FIGURE_CACHE_FILE': path, 'ZOMATO_WARMUP': '0'})
+    server.log.info("Figure cache: %s", path)
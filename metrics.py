@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ## Metrics of the dashboard callbacks
+
+# Every request to a Dash callback is timed as a whole, and broken down into the phases which the code of the callback marks:
+#
+# - filter: selecting the restaurants of a country, a city or the selected filters
+# - aggregate: looking up and grouping the restaurant counts
+# - figure: building the Plotly figure
+# - serialize: serializing the figure to JSON
+# - decode: decoding a figure cached as JSON, which Dash serializes again in the response
+#
+# The rest of the time of the request, spent by Dash and Flask, is counted as the "other" phase. The size of every response
+# is counted as well, along with the hits and misses of the figure cache.
+#
+# The metrics are served in the Prometheus text format on /metrics. Setting ZOMATO_SERVER_TIMING=1 also adds a Server-Timing
+# header with the phases to every callback response, which the network panel of the browser shows. Every gunicorn worker
+# keeps the metrics of the requests it has handled, so Prometheus should scrape every worker.
+
+import threading
+import time
+from contextlib import contextmanager
+
+import flask
+
+#Upper bounds in seconds of the buckets of the callback duration histogram
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+PHASES = ('filter', 'aggregate', 'figure', 'serialize', 'decode')
+
+#Timings of the request handled by the current thread
+_local = threading.local()
+
+
+#Times the code run in the block as a phase of the callback handled by the current thread
+#Nested phases are not counted in the phase enclosing them. Outside of a callback request nothing is timed
+@contextmanager
+def phase(name):
+    timings = getattr(_local, 'timings', None)
+    if timings is None:
+        yield
+        return
+    _local.nested.append(0.0)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        nested = _local.nested.pop()
+        timings[name] = timings.get(name, 0.0) + elapsed - nested
+        if _local.nested:
+            _local.nested[-1] += elapsed
+
+
+class Metrics:
+
+    #callback_names maps the outputs of the Dash callbacks to the name under which they are reported
+    #figure_cache is the cache whose hits and misses are reported
+    def __init__(self, callback_names=None, figure_cache=None):
+        self.callback_names = callback_names or (lambda output: output)
+        self.figure_cache = figure_cache
+        self._lock = threading.Lock()
+        self._requests = {}
+
+    #Adds a callback request to the metrics of its callback
+    def record(self, callback, duration, timings, response_bytes, error):
+        with self._lock:
+            stats = self._requests.get(callback)
+            if stats is None:
+                stats = self._requests[callback] = {'count': 0, 'errors': 0, 'sum': 0.0, 'bytes': 0,
+                                                    'buckets': [0] * len(DURATION_BUCKETS),
+                                                    'phases': dict.fromkeys(PHASES + ('other',), 0.0)}
+            stats['count'] += 1
+            stats['errors'] += error
+            stats['sum'] += duration
+            stats['bytes'] += response_bytes
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    stats['buckets'][i] += 1
+            for name, seconds in timings.items():
+                stats['phases'][name] = stats['phases'].get(name, 0.0) + seconds
+
+    #Returns the metrics in the Prometheus text format
+    def render(self):
+        lines = ['# HELP zomato_callback_duration_seconds Duration of the callback requests.',
+                 '# TYPE zomato_callback_duration_seconds histogram']
+        with self._lock:
+            requests = {callback: dict(stats, buckets=list(stats['buckets']), phases=dict(stats['phases']))
+                        for callback, stats in self._requests.items()}
+        for callback, stats in sorted(requests.items()):
+            for bound, count in zip(DURATION_BUCKETS, stats['buckets']):
+                lines.append('zomato_callback_duration_seconds_bucket{callback="%s",le="%g"} %d' % (callback, bound, count))
+            lines.append('zomato_callback_duration_seconds_bucket{callback="%s",le="+Inf"} %d' % (callback, stats['count']))
+            lines.append('zomato_callback_duration_seconds_sum{callback="%s"} %.6f' % (callback, stats['sum']))
+            lines.append('zomato_callback_duration_seconds_count{callback="%s"} %d' % (callback, stats['count']))
+
+        lines += ['# HELP zomato_callback_phase_seconds_total Time spent by the callback requests in every phase.',
+                  '# TYPE zomato_callback_phase_seconds_total counter']
+        for callback, stats in sorted(requests.items()):
+            for name, seconds in stats['phases'].items():
+                lines.append('zomato_callback_phase_seconds_total{callback="%s",phase="%s"} %.6f' % (callback, name, seconds))
+
+        lines += ['# HELP zomato_callback_response_bytes_total Bytes of the responses of the callback requests.',
+                  '# TYPE zomato_callback_response_bytes_total counter']
+        lines += ['zomato_callback_response_bytes_total{callback="%s"} %d' % (callback, stats['bytes'])
+                  for callback, stats in sorted(requests.items())]
+        lines += ['# HELP zomato_callback_errors_total Callback requests which failed.',
+                  '# TYPE zomato_callback_errors_total counter']
+        lines += ['zomato_callback_errors_total{callback="%s"} %d' % (callback, stats['errors'])
+                  for callback, stats in sorted(requests.items())]
+
+        if self.figure_cache is not None:
+            cache = self.figure_cache.stats()
+            lookups = cache['hits'] + cache['misses']
+            lines += ['# TYPE zomato_figure_cache_hits_total counter',
+                      'zomato_figure_cache_hits_total %d' % cache['hits'],
+                      '# TYPE zomato_figure_cache_misses_total counter',
+                      'zomato_figure_cache_misses_total %d' % cache['misses'],
+                      '# TYPE zomato_figure_cache_hit_ratio gauge',
+                      'zomato_figure_cache_hit_ratio %.4f' % (cache['hits'] / lookups if lookups else 0),
+                      '# TYPE zomato_figure_cache_size gauge',
+                      'zomato_figure_cache_size %d' % cache['size']]
+        return '\n'.join(lines) + '\n'
+
+
+#Times every callback request of the Dash app and serves the metrics on /metrics of its server
+#The Server-Timing header is added to the callback responses when server_timing is set
+def instrument(app, figure_cache=None, server_timing=False):
+    def callback_name(output):
+        callback = app.callback_map.get(output, {}).get('callback')
+        return getattr(callback, '__name__', output)
+
+    metrics = Metrics(callback_name, figure_cache)
+    server = app.server
+
+    @server.before_request
+    def start_timing():
+        if flask.request.path.endswith('/_dash-update-component'):
+            _local.timings = {}
+            _local.nested = []
+            _local.start = time.perf_counter()
+
+    @server.after_request
+    def stop_timing(response):
+        timings = getattr(_local, 'timings', None)
+        if timings is None:
+            return response
+        duration = time.perf_counter() - _local.start
+        _local.timings = None
+        timings['other'] = max(duration - sum(timings.values()), 0.0)
+        output = (flask.request.get_json(silent=True) or {}).get('output', '')
+        response_bytes = 0 if response.direct_passthrough else response.calculate_content_length() or 0
+        metrics.record(callback_name(output), duration, timings, response_bytes, response.status_code >= 500)
+        if server_timing:
+            response.headers['Server-Timing'] = ', '.join('%s;dur=%.2f' % (name, seconds * 1000)
+                                                          for name, seconds in timings.items())
+        return response
+
+    #A request failing with an exception never reaches after_request, so its timings are dropped here
+    @server.teardown_request
+    def drop_timing(exception):
+        _local.timings = None
+
+    @server.route('/metrics')
+    def serve_metrics():
+        return flask.Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+    return metrics
@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ## Zomato Dataset Report
+
+# This is the exploratory analysis of the Zomato dataset which the dashboard is based upon. It is kept apart from the
+# dashboard itself (app.py), so that starting the dashboard only builds what its layout and callbacks need.
+#
+# The report prints the tables to the console and writes every figure as a HTML file into the report directory:
+#
+#     python report.py [output directory]
+
+# ### Importing the Python Libraries
+
+# In[1]:
+
+
+import os
+import sys
+
+import plotly.express as px
+
+import dataset
+
+
+# ### Loading the dataset and understanding it
+
+# In[2]:
+
+
+zomato_dataset = dataset.load_dataset()
+figures = {}
+
+
+# In[3]:
+
+
+print(zomato_dataset.head())
+
+
+# In[4]:
+
+
+zomato_dataset.info()
+
+
+# As we can see, our dataset has 21 different columns. These columns contain all the information about the restraunts which are available on the Zomato app along with their locations, ratings, average cost, availability of delivery, Rating color (denoting number of stars) etc.
+
+# In[5]:
+
+
+print(zomato_dataset.describe())
+
+
+# In[6]:
+
+
+print(zomato_dataset.isnull().sum())
+
+
+# As we can see, there are no NULL values left in the dataset. The missing Cuisines were replaced with "Other" while loading it.
+#
+# Now, let us see what restaurants have "Other" as the cuisine that is served there:
+
+# In[7]:
+
+
+print(zomato_dataset[zomato_dataset['Cuisines']=="Other"])
+
+
+# In[8]:
+
+
+print(zomato_dataset['Cuisines'].value_counts())
+
+
+# ### Analysing and Visualizing the dataset
+
+# Let's see the different countries from which restaurants are listed on Zomato
+
+# In[9]:
+
+
+country_wise_df = (zomato_dataset['Country'].value_counts())
+print(country_wise_df)
+
+
+# As we can clearly see, the majority of restaurants listed on Zomato are from India, which makes sense as Zomato is a company that has its home-base in India itself. It has only recently started expanding to other countries.
+#
+# Let's visulaize this data clearly using a pie-chart
+
+# In[10]:
+
+
+pie_country_wise = px.pie(country_wise_df, values=country_wise_df.values, names=country_wise_df.index, color_discrete_sequence=px.colors.sequential.Reds_r)
+pie_country_wise.update_traces(textposition='inside')
+pie_country_wise.update_layout(uniformtext_minsize=12, uniformtext_mode='hide')
+pie_country_wise.update_layout(title_text="Zomato's Presence around the World", title_x=0.5)
+figures['country_wise_pie'] = pie_country_wise
+
+
+# In[11]:
+
+
+print(zomato_dataset['Rating color'].value_counts())
+
+
+# In[12]:
+
+
+country_df = zomato_dataset[zomato_dataset['Country']=='India']
+rating_df = country_df[country_df['Rating color']=='Orange']
+rating_wise_city_df = rating_df['City'].cat.remove_unused_categories().value_counts()
+pie_rating_wise = px.pie(rating_wise_city_df, values=rating_wise_city_df.values, names=rating_wise_city_df.index, color_discrete_sequence=px.colors.sequential.Reds_r, hole=0.6)
+pie_rating_wise.update_traces(textposition='inside')
+pie_rating_wise.update_layout(uniformtext_minsize=12, uniformtext_mode='hide')
+pie_rating_wise.update_layout(title_text="Country wise % of restaurants having selected number of stars", title_x=0.5)
+figures['india_orange_rating_donut'] = pie_rating_wise
+
+
+# Now lets take a look at the cities in India from where maximum number of restaurants are listed on Zomato
+
+# In[13]:
+
+
+country_wise_df = zomato_dataset[zomato_dataset['Country']=='India']
+city_count = (country_wise_df['City'].cat.remove_unused_categories().value_counts())
+print(city_count)
+
+
+# In[14]:
+
+
+fig = px.bar(city_count, x=city_count.index, y=city_count.values,labels={'x': "Cities","y": "Number of Restaurants"},color_discrete_sequence=px.colors.qualitative.Set1)
+fig.update_layout(plot_bgcolor="#f4f4f2")
+fig.update_layout(title_text='Cities in India listed on Zomato', title_x=0.5)
+figures['india_cities_bar'] = fig
+
+
+# Clearly, most of the restaurants listed on Zomato are located in New Delhi and least are in Mohali and Panchkula
+
+# Lets take a look at how many of these restaurants in each city of India have online delivery services
+
+# In[15]:
+
+
+fig2=px.histogram(country_wise_df, x=country_wise_df['City'], color="Has Online delivery",barmode='group',
+                      color_discrete_sequence=px.colors.sequential.Reds_r)
+fig2.update_layout(plot_bgcolor="#f4f4f2")
+fig2.update_layout(title_text='Restraunts having online delivery service', title_x=0.5)
+figures['india_online_delivery_bar'] = fig2
+
+
+# As expected, New Delhi has the maximum number of restaurants offering online delivery service via Zomato
+
+# Now let's take a look at how does the rating of a restaurant vary with it's average cost for two and wether a higher cost affects rating or not
+
+# In[16]:
+
+
+city_wise_df = zomato_dataset[zomato_dataset['City']=='New Delhi']
+fig = px.scatter(city_wise_df, x="Average Cost for two", y="Aggregate rating",color="Average Cost for two",
+                 color_continuous_scale=px.colors.sequential.Reds_r,hover_data=["Restaurant Name"])
+fig.update_layout(plot_bgcolor="#f4f4f2")
+fig.update_layout(title_text='Cost for Two vs. Rating', title_x=0.5)
+figures['new_delhi_cost_vs_rating'] = fig
+
+
+# Now, lets take a look at the rating of the restaurants in India. Let's see in which city are majority of the 5 star rating restaurants located using a donut graph.
+
+# The Rating color column in the dataset represents the stars of the restaurant. The order is as follows:
+# - Dark Green: 5 stars
+# - Green: 4 stars
+# - Yellow: 3 stars
+# - Orange: 2 stars
+# - Red: 1 star
+# - White: No Rating
+
+# In[17]:
+
+
+print(country_df['Rating color'].cat.remove_unused_categories().value_counts())
+
+
+# In[18]:
+
+
+rating_df = country_df[country_df['Rating color']=='Dark Green']
+rating_wise_city_df = rating_df['City'].cat.remove_unused_categories().value_counts()
+pie_rating_wise = px.pie(rating_wise_city_df, values=rating_wise_city_df.values, names=rating_wise_city_df.index,
+                             color_discrete_sequence=px.colors.sequential.Reds_r, hole=0.6)
+pie_rating_wise.update_traces(textposition='inside')
+pie_rating_wise.update_layout(uniformtext_minsize=12, uniformtext_mode='hide')
+pie_rating_wise.update_layout(title_text="% of restaurants having selected number of ★", title_x=0.5)
+figures['india_5_star_donut'] = pie_rating_wise
+
+
+# Naturally, most of them are in New Delhi.
+
+# Now, lets see in which country are the majority of restaurants having 5 star rating located on the world map.
+
+# In[19]:
+
+
+rating_df_cmap = zomato_dataset[zomato_dataset['Rating color']=='Dark Green']
+cmap_df = (rating_df_cmap['Country'].cat.remove_unused_categories().value_counts())
+print(cmap_df)
+
+
+# In[20]:
+
+
+fig = px.choropleth(cmap_df, locations=cmap_df.index, locationmode='country names',color=cmap_df.values ,color_continuous_scale=px.colors.sequential.Reds)
+fig.update_layout(geo=dict(bgcolor= '#f4f4f2'), title_text = 'Restaurants having selected number of ★ by Country',title_x=0.5)
+figures['5_star_world_map'] = fig
+
+
+# Clearly a vast majority of them are in India itself.
+
+# Finally, every figure is written as a HTML file into the report directory.
+
+# In[ ]:
+
+
+if __name__ == '__main__':
+    report_dir = sys.argv[1] if len(sys.argv) > 1 else "report"
+    os.makedirs(report_dir, exist_ok=True)
+    for name, figure in figures.items():
+        figure.write_html(os.path.join(report_dir, name + ".html"), include_plotlyjs='cdn')
+    print("Wrote %d figures to %s" % (len(figures), report_dir))
@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ## Search index of the restaurants
+
+# The search box of the dashboard suggests restaurants as their Restaurant Name, Locality or Address is typed. Every text is
+# split into lower case words, and the index keeps the distinct words in sorted order along with the restaurants using each
+# of them. All the words starting with a prefix are then next to each other, so the restaurants matching a typed word are
+# found with two binary searches instead of scanning the texts of every restaurant.
+#
+# The restaurants are numbered by their Votes, most voted first, and the restaurants of every word are stored in that order.
+# The best suggestions for a query are then simply the restaurants having the smallest numbers. The index also keeps the
+# words of every restaurant, so for a query of several words only the best restaurants matching its rarest word are checked
+# for the other words, instead of intersecting the restaurants of every word in full.
+#
+# The words are kept as UTF-8 bytes, whose sorted order is the same as the one of the text, in plain numpy arrays. The index
+# is saved next to the cache file of the dataset (see dataset.load_search_index) and memory mapped back, so the addresses are
+# only read and split into words once, and not by every gunicorn worker.
+
+import os
+import re
+import shutil
+
+import numpy as np
+import pandas as pd
+
+#Number of restaurants suggested for a query
+SUGGESTIONS = 10
+
+WORD = re.compile(r'\w+')
+
+#Arrays of the index, which are saved to a file each
+ARRAYS = ('rows', 'vocabulary', 'offsets', 'numbers', 'word_offsets', 'word_ids', 'ids', 'id_rows')
+
+
+#Returns the lower case words of a text
+def tokenize(text):
+    return WORD.findall(str(text).lower())
+
+
+#Returns the (word, restaurant number) pairs of the texts, where codes maps every restaurant to its text in texts
+#Texts repeated by many restaurants, like the names of chains or the localities, are only split into words once
+def _words(codes, texts, numbers):
+    words = pd.Series(texts, dtype=object).str.lower().str.findall(WORD).explode().dropna()
+    pairs = pd.DataFrame({'code': codes, 'number': numbers}).merge(
+        pd.DataFrame({'code': words.index, 'word': words.to_numpy()}), on='code')
+    return pairs[['word', 'number']]
+
+
+class SearchIndex:
+
+    #Builds the index over the Restaurant Name and Locality of the dataset
+    #addresses is an iterable of dataframes of the Restaurant ID and Address columns (see dataset.read_addresses), which
+    #are split into words chunk by chunk, so the addresses are never held in memory as a whole
+    def __init__(self, zomato_dataset, addresses=()):
+        numbers = self._number(zomato_dataset)
+        words = pd.concat(self._texts(zomato_dataset, numbers, addresses, numbers), ignore_index=True).drop_duplicates()
+        word_codes, vocabulary = pd.factorize(words['word'], sort=True)
+        self._build(np.char.encode(np.asarray(vocabulary, dtype=str), 'utf-8'), word_codes,
+                    words['number'].to_numpy(dtype='int32'))
+
+    #Returns the index of a dataset updated from the index of the previous dataset, where added are the restaurants which
+    #have been added or changed since, along with the chunks of addresses holding at least theirs
+    #The words of the restaurants which are kept come from the previous index, so only the texts of the added restaurants
+    #are split into words
+    @classmethod
+    def updated(cls, index, zomato_dataset, added, addresses=()):
+        updated = cls.__new__(cls)
+        numbers = updated._number(zomato_dataset)
+
+        #The words of the previous index are taken over for the restaurants which are still in the dataset unchanged, under
+        #their new numbers
+        added_ids = added['Restaurant ID'].to_numpy()
+        previous_ids = np.empty(len(index._ids), dtype=index._ids.dtype)
+        previous_ids[index._id_rows] = index._ids
+        numbered_ids = previous_ids[index._rows]
+        rows = updated._locate(numbered_ids)
+        renumbered = np.where((rows >= 0) & ~np.isin(numbered_ids, added_ids), numbers[rows], -1)[index._numbers]
+        kept = renumbered >= 0
+        word_codes = np.repeat(np.arange(len(index._vocabulary)), np.diff(index._offsets))[kept]
+        kept_numbers = renumbered[kept]
+
+        addresses = (chunk[chunk['Restaurant ID'].isin(added_ids)] for chunk in addresses)
+        words = pd.concat(updated._texts(added, numbers[updated._locate(added_ids)], addresses, numbers),
+                          ignore_index=True).drop_duplicates()
+        added_words = np.char.encode(np.asarray(words['word'].to_numpy(), dtype=str), 'utf-8')
+
+        #The words of the added restaurants are merged into the vocabulary, and the words left without restaurants dropped
+        vocabulary = np.union1d(index._vocabulary, added_words)
+        word_codes = np.concatenate([np.searchsorted(vocabulary, index._vocabulary)[word_codes],
+                                     np.searchsorted(vocabulary, added_words)])
+        used = np.bincount(word_codes, minlength=len(vocabulary)) > 0
+        word_codes = (np.cumsum(used) - 1)[word_codes]
+        updated._build(vocabulary[used], word_codes, np.concatenate([kept_numbers, words['number'].to_numpy(dtype='int32')]))
+        return updated
+
+    #Numbers the restaurants of the dataset by their Votes and returns the number of every row
+    #The Restaurant IDs are kept sorted along with their rows, so that a restaurant is also found by its Restaurant ID
+    def _number(self, zomato_dataset):
+        self._rows = np.argsort(-zomato_dataset['Votes'].to_numpy(dtype='int64'), kind='stable')
+        numbers = np.empty(len(self._rows), dtype='int32')
+        numbers[self._rows] = np.arange(len(self._rows), dtype='int32')
+        ids = zomato_dataset['Restaurant ID'].to_numpy()
+        self._id_rows = np.argsort(ids, kind='stable')
+        self._ids = ids[self._id_rows]
+        return numbers
+
+    #Returns the (word, restaurant number) pairs of the Restaurant Name and Locality of the restaurants numbered by
+    #restaurant_numbers, and of their addresses, which are matched to the rows of the dataset numbered by numbers by their
+    #Restaurant ID
+    def _texts(self, restaurants, restaurant_numbers, addresses, numbers):
+        name_codes, names = pd.factorize(restaurants['Restaurant Name'])
+        words = [_words(name_codes, names, restaurant_numbers)]
+        if 'Locality' in restaurants:
+            locality_codes, localities = pd.factorize(restaurants['Locality'])
+            words.append(_words(locality_codes, localities, restaurant_numbers))
+        for chunk in addresses:
+            rows = self._locate(chunk['Restaurant ID'].to_numpy())
+            address_codes, address_texts = pd.factorize(chunk['Address'][rows >= 0])
+            words.append(_words(address_codes, address_texts, numbers[rows[rows >= 0]]))
+        return words
+
+    #Keeps the restaurants of every word, and the words of every restaurant
+    #vocabulary holds the sorted words as UTF-8 bytes, and every restaurant number uses the word of its word code
+    #The pairs are sorted on a single key made of the word code and the number, which is much faster than sorting on both
+    def _build(self, vocabulary, word_codes, numbers):
+        self._vocabulary = vocabulary
+        restaurants, words = max(len(self._rows), 1), max(len(vocabulary), 1)
+        keys = np.sort(word_codes.astype('int64') * restaurants + numbers)
+        self._numbers = (keys % restaurants).astype('int32')
+        self._offsets = np.searchsorted(keys, np.arange(len(vocabulary) + 1) * restaurants)
+        keys = np.sort(numbers.astype('int64') * words + word_codes)
+        self._word_ids = (keys % words).astype('int32')
+        self._word_offsets = np.searchsorted(keys, np.arange(len(self._rows) + 1) * words)
+
+    #Returns the rows of the restaurants having the Restaurant IDs, or -1 for the ones which are not in the dataset
+    def _locate(self, ids):
+        if not len(self._ids):
+            return np.full(len(ids), -1)
+        found = np.minimum(np.searchsorted(self._ids, ids), len(self._ids) - 1)
+        return np.where(self._ids[found] == ids, self._id_rows[found], -1)
+
+    #Writes the arrays of the index to a directory
+    #They are first written to a temporary directory which is then renamed, so other processes never read half of them
+    def save(self, path):
+        tmp_path = '%s.%d.tmp' % (path, os.getpid())
+        os.makedirs(tmp_path, exist_ok=True)
+        for name in ARRAYS:
+            np.save(os.path.join(tmp_path, name + '.npy'), getattr(self, '_' + name))
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            #Another process has saved the same index meanwhile
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+    #Returns the index saved to a directory, whose arrays are memory mapped instead of read
+    @classmethod
+    def load(cls, path):
+        index = cls.__new__(cls)
+        for name in ARRAYS:
+            setattr(index, '_' + name, np.load(os.path.join(path, name + '.npy'), mmap_mode='r'))
+        return index
+
+    #Returns the row of the restaurant having the Restaurant ID, or None when there is no such restaurant
+    def find(self, restaurant_id):
+        row = self._locate(np.array([restaurant_id]))[0]
+        return int(row) if row >= 0 else None
+
+    #Returns the (first, last) words starting with the prefix
+    def _prefix(self, prefix):
+        prefix = prefix.encode('utf-8')
+        return (np.searchsorted(self._vocabulary, prefix, side='left'),
+                np.searchsorted(self._vocabulary, prefix + b'\xff', side='left'))
+
+    #Returns which of the restaurant numbers have a word in every one of the (first, last) ranges of words
+    def _have_words(self, numbers, word_ranges):
+        found = np.ones(len(numbers), dtype=bool)
+        if not word_ranges:
+            return found
+        starts, stops = self._word_offsets[numbers], self._word_offsets[numbers + 1]
+        lengths = stops - starts
+        owners = np.repeat(np.arange(len(numbers)), lengths)
+        word_ids = self._word_ids[np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths - starts, lengths)]
+        for first, last in word_ranges:
+            has_word = np.zeros(len(numbers), dtype=bool)
+            has_word[owners[(word_ids >= first) & (word_ids < last)]] = True
+            found &= has_word
+        return found
+
+    #Returns the rows of the restaurants matching every word of the query, most voted first
+    #Every word of the query is matched as the prefix of a word, as the last one at least may still be being typed
+    def search(self, query, limit=SUGGESTIONS):
+        words = tokenize(query)
+        if not words:
+            return np.empty(0, dtype='int64')
+        word_ranges = [self._prefix(word) for word in words]
+
+        #The best restaurants of the rarest word are checked for the other words, taking more of them until enough match
+        word_ranges.sort(key=lambda word_range: self._offsets[word_range[1]] - self._offsets[word_range[0]])
+        first, last = word_ranges[0]
+        numbers = self._numbers[self._offsets[first]:self._offsets[last]]
+        candidates = limit * 8
+        while True:
+            best = np.unique(numbers if len(numbers) <= candidates else np.partition(numbers, candidates)[:candidates])
+            best = best[self._have_words(best, word_ranges[1:])]
+            if len(best) >= limit or len(numbers) <= candidates:
+                return self._rows[best[:limit]]
+            candidates *= 8
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ## Spatial index of the restaurants
+
+# Every restaurant has a Longitude and a Latitude, but drawing every restaurant of a country on a map would mean sending all
+# of them to the browser. Instead the restaurants are counted in a grid of cells at a few levels of detail. At level z the
+# world is divided into 2**z x 2**z cells of longitude and latitude, like the cells of a geohash.
+#
+# The counts are kept per country, city and number of stars, so the map can be filtered like the rest of the dashboard. They
+# are also grouped into tiles of 8 x 8 cells, which are the unit in which the map asks for the cells of the visible area.
+#
+# The restaurants nearest to a point are found with a KD-tree. The tree is built over the positions of the restaurants on the
+# unit sphere, where the straight line (chord) distance between two points grows with their great circle distance, so the
+# nearest restaurants of the tree are also the nearest ones by the haversine distance.
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+#Mean radius of the Earth in km
+EARTH_RADIUS_KM = 6371.0088
+
+#Levels of detail of the grid, a cell at level 15 is about 1 km wide at the equator
+GRID_LEVELS = (3, 6, 9, 12, 15)
+
+#A tile is TILE_CELLS x TILE_CELLS cells, the visible area of the map is extended to whole tiles
+TILE_CELLS = 8
+
+
+#Returns the column of the cells of the given longitudes at a level
+def cell_x(lon, level):
+    return np.clip(np.floor((lon + 180) / 360 * 2 ** level), 0, 2 ** level - 1).astype('int32')
+
+
+#Returns the row of the cells of the given latitudes at a level
+def cell_y(lat, level):
+    return np.clip(np.floor((lat + 90) / 180 * 2 ** level), 0, 2 ** level - 1).astype('int32')
+
+
+#Returns the level of the grid to draw at a zoom level of the map
+#At zoom z the map is 256 * 2**z pixels wide, so cells of the level z + 5 are about 8 pixels wide
+def level_for_zoom(zoom):
+    return max([level for level in GRID_LEVELS if level <= zoom + 5] or [GRID_LEVELS[0]])
+
+
+#Returns the (first, last) columns and rows of the tiles covering the bounds (west, east, south, north) at a level
+def tiles_for_bounds(bounds, level):
+    west, east, south, north = bounds
+    return (int(cell_x(west, level)) // TILE_CELLS, int(cell_x(east, level)) // TILE_CELLS,
+            int(cell_y(south, level)) // TILE_CELLS, int(cell_y(north, level)) // TILE_CELLS)
+
+
+#Returns the positions of the given longitudes and latitudes on the unit sphere
+def unit_vectors(lon, lat):
+    lon, lat = np.radians(lon), np.radians(lat)
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+
+#Returns the great circle distance in km between the points of the given longitudes and latitudes, by the haversine formula
+def haversine_km(lon1, lat1, lon2, lat2):
+    lon1, lat1, lon2, lat2 = map(np.radians, (lon1, lat1, lon2, lat2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+#Returns the rows of the restaurants which are listed with coordinates, the ones without are listed at (0, 0)
+def located_rows(zomato_dataset):
+    return ((zomato_dataset['Longitude'] != 0) | (zomato_dataset['Latitude'] != 0)).to_numpy()
+
+
+#Returns whether the values of a level of the multi index are between first and last, for every entry of the index
+#The values of the level are compared once and the result is taken by the codes of the entries
+def in_range(index, name, first, last):
+    level = index.names.index(name)
+    values = index.levels[level].to_numpy()
+    return ((values >= first) & (values <= last))[index.codes[level]]
+
+
+class GridIndex:
+
+    #Counts the restaurants of the dataset per country, city, number of stars, tile and cell at every level of the grid
+    #Restaurants listed without coordinates (0, 0) are left out
+    #Only the columns are masked, as filtering the whole dataset would copy it out of the memory mapped cache file
+    def __init__(self, zomato_dataset, levels=GRID_LEVELS):
+        located = located_rows(zomato_dataset)
+        lon = zomato_dataset['Longitude'].to_numpy(dtype='float64')[located]
+        lat = zomato_dataset['Latitude'].to_numpy(dtype='float64')[located]
+        country = zomato_dataset['Country'].array[located]
+        city = zomato_dataset['City'].array[located]
+        stars = zomato_dataset['Stars'].to_numpy()[located]
+        self.levels = levels
+        self._cells = {}
+        for level in levels:
+            x, y = cell_x(lon, level), cell_y(lat, level)
+            cells = pd.DataFrame({'Country': country, 'City': city, 'Stars': stars,
+                                  'tile_x': x // TILE_CELLS, 'tile_y': y // TILE_CELLS, 'x': x, 'y': y})
+            self._cells[level] = cells.groupby(['Country', 'City', 'Stars', 'tile_x', 'tile_y', 'x', 'y'],
+                                               observed=True).size()
+
+    #Returns the number of restaurants per cell at a level as a dataframe of the lon, lat of the cell centers and the count
+    #The restaurants can be filtered by country, city and a (lo, hi) range of stars, and the cells by the tiles (see tiles_for_bounds)
+    #The counts of the visible tiles are selected before the counts of the cells are summed over the cities and stars
+    def cells(self, level, country=None, city=None, stars=None, tiles=None):
+        counts = self._cells[level]
+        try:
+            if country is not None and city is not None:
+                counts = counts.loc[(country, city)]
+            elif country is not None:
+                counts = counts.loc[country]
+            if stars is not None:
+                values = counts.index.get_level_values('Stars')
+                counts = counts[(values >= stars[0]) & (values <= stars[1])]
+        except KeyError:
+            counts = counts.iloc[:0]
+        if tiles is not None:
+            first_x, last_x, first_y, last_y = tiles
+            visible = in_range(counts.index, 'tile_x', first_x, last_x) & in_range(counts.index, 'tile_y', first_y, last_y)
+            counts = counts[visible]
+        counts = counts.groupby(level=['x', 'y']).sum()
+
+        x = counts.index.get_level_values('x').to_numpy()
+        y = counts.index.get_level_values('y').to_numpy()
+        return pd.DataFrame({'lon': (x + 0.5) * 360 / 2 ** level - 180, 'lat': (y + 0.5) * 180 / 2 ** level - 90,
+                             'count': counts.to_numpy()})
+
+
+class NearestIndex:
+
+    #Builds the KD-tree over the restaurants of the dataset which are listed with coordinates
+    def __init__(self, zomato_dataset):
+        self._rows = np.flatnonzero(located_rows(zomato_dataset))
+        self._lon = zomato_dataset['Longitude'].to_numpy(dtype='float64')[self._rows]
+        self._lat = zomato_dataset['Latitude'].to_numpy(dtype='float64')[self._rows]
+        self._tree = cKDTree(unit_vectors(self._lon, self._lat)) if len(self._rows) else None
+
+    #Returns the positions in the dataset of the k restaurants nearest to the point, nearest first, along with their
+    #distances in km
+    def nearest(self, lon, lat, k):
+        k = min(int(k), len(self._rows))
+        if self._tree is None or k < 1:
+            return np.empty(0, dtype='int64'), np.empty(0)
+        _, found = self._tree.query(unit_vectors([lon], [lat])[0], k=[i + 1 for i in range(k)])
+        return self._rows[found], haversine_km(lon, lat, self._lon[found], self._lat[found])
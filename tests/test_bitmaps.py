@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+import bitmaps
+import dataset
+
+
+@pytest.fixture(scope='module')
+def zomato_dataset():
+    return dataset.build_dataset()
+
+
+#Sparse cuisines are kept as row positions, and they select the same restaurants as the lists in the Cuisines column when
+#combined with each other and with the cuisines kept as bitmaps
+@pytest.mark.parametrize('cuisines', [['Malay', 'Beverages'], ['Beverages', 'Salad'], ['North Indian', 'Mughlai'],
+                                      ['North Indian', 'Chinese', 'Thai'], ['Thai', 'Unknown']])
+@pytest.mark.parametrize('match', ['and', 'or'])
+def test_cuisine_bitmap_selects_the_restaurants_serving_the_cuisines(zomato_dataset, cuisines, match):
+    index = bitmaps.CuisineIndex(zomato_dataset)
+    assert index._rows and index._bitmaps
+
+    served = zomato_dataset['Cuisines'].astype(str).str.split(',').map(lambda listed: {c.strip() for c in listed})
+    selected = served.map(set(cuisines).issubset if match == 'and' else set(cuisines).intersection).astype(bool)
+    rows = bitmaps.rows(index.bitmap(cuisines, match), len(zomato_dataset))
+    assert np.array_equal(rows, np.flatnonzero(selected.to_numpy()))
+
+
+#The rows of a country or a city are combined with the other filters over the bytes of their row ranges only, and select the
+#same restaurants as comparing the columns
+@pytest.mark.parametrize('column, value', [('Country', 'India'), ('City', 'New Delhi'), ('City', 'Mohali'),
+                                           ('City', 'Nowhere')])
+@pytest.mark.parametrize('filters', [{}, {'Stars': [4, 5]},
+                                     {'Stars': [3], 'Price range': [1, 4], 'Has Online delivery': [True]}])
+def test_filter_bitmap_of_row_ranges_selects_the_matching_restaurants(zomato_dataset, column, value, filters):
+    row_ranges = {name: dataset.build_row_ranges(zomato_dataset, name) for name in ['Country', 'City']}
+    index = bitmaps.FilterIndex(zomato_dataset, row_ranges, columns=bitmaps.FILTER_COLUMNS + ['Has Online delivery'])
+    served = bitmaps.CuisineIndex(zomato_dataset).bitmap(['North Indian'])
+
+    selected = (zomato_dataset[column] == value).to_numpy()
+    for name, values in filters.items():
+        selected &= zomato_dataset[name].isin(values).to_numpy()
+    selected &= zomato_dataset['Cuisines'].astype(str).str.contains('North Indian').to_numpy()
+    bitmap = index.bitmap(dict(filters, **{column: [value]}), [served])
+    assert np.array_equal(bitmaps.rows(bitmap, len(zomato_dataset)), np.flatnonzero(selected))
@@ -0,0 +1,113 @@
+import pandas as pd
+import pytest
+
+import dataset
+
+
+#Returns the numeric columns of the dataset which are read-only views of the memory mapped cache file
+def mapped_columns(zomato_dataset):
+    return [column for column in zomato_dataset.columns
+            if zomato_dataset[column].dtype.kind in 'iuf' and not zomato_dataset[column].to_numpy().flags.writeable]
+
+
+#The dashboard serving the dataset from the cache file, like a gunicorn worker
+@pytest.fixture
+def dashboard():
+    dataset.build_cache()
+    import app
+    return app
+
+
+#Fires the callback of the output through the Dash server, with the values of its inputs and states by their "id.property",
+#and returns its response
+def fire(dashboard, output, values):
+    spec = dashboard.app.callback_map[output]
+
+    def with_values(dependencies):
+        return [dict(dependency, value=values.get('%s.%s' % (dependency['id'], dependency['property'])))
+                for dependency in dependencies]
+    if output.startswith('..'):
+        outputs = [dict(zip(('id', 'property'), part.rsplit('.', 1))) for part in output[2:-2].split('...')]
+    else:
+        outputs = dict(zip(('id', 'property'), output.rsplit('.', 1)))
+    changed = next(name for name in values if any(name == '%s.%s' % (dependency['id'], dependency['property'])
+                                                   for dependency in spec['inputs']))
+    response = dashboard.server.test_client().post('/_dash-update-component', json={
+        'output': output, 'outputs': outputs, 'inputs': with_values(spec['inputs']), 'state': with_values(spec['state']),
+        'changedPropIds': [changed]})
+    assert response.status_code == 200
+    return response.get_json()['response']
+
+
+#The numeric columns read from the cache file have to stay read-only views of the memory mapped file once everything the
+#dashboard precomputes has been built, otherwise every gunicorn worker holds its own copy of them
+def test_snapshot_keeps_cached_columns_memory_mapped(tmp_path):
+    zomato_dataset = dataset.read_cache(dataset.build_cache(cache_dir=str(tmp_path)))
+    mapped = mapped_columns(zomato_dataset)
+    assert 'Votes' in mapped and 'Longitude' in mapped
+
+    dataset.Snapshot(zomato_dataset, 'test')
+    for column in mapped:
+        assert not zomato_dataset[column].to_numpy().flags.writeable, column
+
+
+#A dataset larger than a record batch of the Feather format is still written as a single one, so its columns are memory
+#mapped as a whole instead of being concatenated into a copy
+def test_large_cache_file_is_memory_mapped(tmp_path):
+    zomato_dataset = dataset.build_dataset()
+    zomato_dataset = dataset.concat_datasets([zomato_dataset] * (70_000 // len(zomato_dataset) + 1))
+    path = str(tmp_path / 'zomato.feather')
+    dataset.write_cache(zomato_dataset, path)
+    assert {'Votes', 'Longitude'} <= set(mapped_columns(dataset.read_cache(path)))
+
+
+#A streamed dataset holds the same restaurants in the same order as the one built at once, and its numeric columns are
+#memory mapped from the row store like the ones of the cache file, also when the row store has been written by another start
+def test_streamed_dataset_is_memory_mapped(tmp_path):
+    built = dataset.build_dataset()[dataset.row_store_columns]
+    for _ in range(2):
+        zomato_dataset = dataset.stream_snapshot(chunksize=2000, cache_dir=str(tmp_path)).zomato_dataset
+        pd.testing.assert_frame_equal(zomato_dataset, built, check_categorical=False)
+        assert {'Votes', 'Longitude'} <= set(mapped_columns(zomato_dataset))
+
+
+#The callbacks listing restaurants only take the columns they show from the rows of the dataset, so they do not copy the
+#memory mapped columns into the worker either
+def test_callbacks_keep_cached_columns_memory_mapped(dashboard):
+    zomato_dataset = dataset.current().zomato_dataset
+    mapped = mapped_columns(zomato_dataset)
+    assert 'Votes' in mapped and 'Longitude' in mapped
+
+    options = fire(dashboard, 'search_dropdown.options', {'search_dropdown.search_value': 'pizza hut'})
+    options = options['search_dropdown']['options']
+    assert options and all('Pizza Hut' in option['label'] for option in options)
+    details = fire(dashboard, 'search_details.children', {'search_dropdown.value': options[0]['value']})
+    assert options[0]['label'] in str(details)
+
+    nearest = fire(dashboard, '..near_lat.value...near_lon.value...nearest_restaurants.children..',
+                   {'near_lat.value': 28.63, 'near_lon.value': 77.22, 'near_k.value': 5})
+    assert str(nearest['nearest_restaurants']['children']).count("'Tr'") == 6
+
+    for filters in [{}, {'cuisines_dropdown.value': ['North Indian']}, {'slider.value': [4, 5]}]:
+        values = dict({'cities_dropdown.value': 'New Delhi', 'slider.value': [0, 5], 'cuisines_match.value': 'or'},
+                      **filters)
+        scatter_plot = fire(dashboard, 'scatter_plot.figure', values)
+        assert scatter_plot['scatter_plot']['figure']['data']
+
+    assert mapped_columns(zomato_dataset) == mapped
+
+
+#The views of the density map after a pan are kept in a cache of their own, so panning does not evict the other figures
+def test_panned_density_map_views_are_not_kept_in_the_figure_cache(dashboard):
+    dashboard.map_view_cache.clear()
+    values = {'countries_dropdown.value': 'India', 'cities_dropdown.value': 'New Delhi', 'slider.value': [0, 5]}
+    fire(dashboard, 'density_map.figure', values)
+    cached = len(dashboard.figure_cache)
+    assert len(dashboard.map_view_cache) == 0
+
+    coordinates = [[77.1, 28.7], [77.3, 28.7], [77.3, 28.5], [77.1, 28.5]]
+    for zoom in [4, 7, 10]:
+        relayout_data = {'mapbox.zoom': zoom, 'mapbox._derived': {'coordinates': coordinates}}
+        density_map = fire(dashboard, 'density_map.figure', dict({'density_map.relayoutData': relayout_data}, **values))
+        assert density_map['density_map']['figure']['data'][0]['z']
+    assert len(dashboard.figure_cache) == cached and len(dashboard.map_view_cache) == 3
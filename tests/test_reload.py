@@ -0,0 +1,89 @@
+import shutil
+
+import pandas as pd
+
+import dataset
+import search
+
+
+def assert_same_counts(counts, expected):
+    assert counts.keys() == expected.keys()
+    for name in expected:
+        pd.testing.assert_series_equal(counts[name], expected[name], check_names=False, check_index_type=False, obj=name)
+
+
+#Some restaurants of the dataset moved to another city, some were removed and one was added
+def changed_dataset(zomato_dataset):
+    new = zomato_dataset.iloc[100:].copy()
+    new['City'] = new['City'].astype(object)
+    new.iloc[:50, new.columns.get_loc('City')] = 'New Delhi'
+    added = zomato_dataset.iloc[[100]].assign(**{'Restaurant ID': zomato_dataset['Restaurant ID'].max() + 1})
+    return pd.concat([new, added], ignore_index=True).astype({'City': zomato_dataset['City'].dtype})
+
+
+#The rows which were removed or changed are taken out of the old dataset and the ones which were added or changed come from
+#the new one
+def test_diff_datasets_finds_removed_changed_and_added_restaurants():
+    old = dataset.build_dataset()
+    new = changed_dataset(old)
+    removed, added = dataset.diff_datasets(old, new)
+
+    changed_ids = set(new['Restaurant ID'].iloc[:50][(new['City'].iloc[:50] != old['City'].iloc[100:150].to_numpy())])
+    assert set(removed['Restaurant ID']) == set(old['Restaurant ID'].iloc[:100]) | changed_ids
+    assert set(added['Restaurant ID']) == changed_ids | {old['Restaurant ID'].max() + 1}
+
+
+#Applying the difference to the counts gives the same counts as counting the new dataset
+def test_update_counts_matches_counting_the_new_dataset():
+    old = dataset.build_dataset()
+    new = changed_dataset(old)
+    removed, added = dataset.diff_datasets(old, new)
+
+    counts = dataset.update_counts(dataset.count_restaurants(old), removed, added)
+    assert_same_counts(counts, dataset.count_restaurants(new))
+
+
+#Rows appended to the csv file are parsed on their own, and a restaurant appended again replaces its previous row in the
+#dataset, the counts and the search index
+#The last line of the csv file is not terminated, so it is terminated before the dataset is loaded
+def test_reloader_applies_rows_appended_to_the_csv_file(tmp_path, monkeypatch):
+    for file in [dataset.ZOMATO_FILE, dataset.COUNTRY_CODE_FILE, dataset.RATES_FILE]:
+        shutil.copy(file, tmp_path)
+    monkeypatch.chdir(tmp_path)
+    with open(dataset.ZOMATO_FILE, 'ab') as f:
+        f.write(b'\r\n')
+    zomato_dataset = dataset.build_dataset()
+    version = dataset.dataset_version()
+    search_index = search.SearchIndex(zomato_dataset, dataset.read_addresses())
+    monkeypatch.setattr(dataset, '_snapshot', dataset.Snapshot(zomato_dataset, version, search_index=search_index))
+    reloader = dataset.DatasetReloader(60)
+
+    with open(dataset.ZOMATO_FILE, 'rb') as f:
+        rows = f.read().splitlines(keepends=True)[1:3]
+    new_id = zomato_dataset['Restaurant ID'].max() + 1
+    new_row = b'%d,' % new_id + rows[0].split(b',', 1)[1]
+    changed_row = rows[1].replace(b',3,', b',1,', 1)
+    with open(dataset.ZOMATO_FILE, 'ab') as f:
+        f.write(new_row + changed_row)
+    monkeypatch.setattr(dataset, 'diff_datasets', None)
+    read_addresses, address_files = dataset.read_addresses, []
+
+    def recorded_read_addresses(file, *args):
+        address_files.append(file)
+        return read_addresses(file, *args)
+    monkeypatch.setattr(dataset, 'read_addresses', recorded_read_addresses)
+
+    snapshot = reloader.check()
+    assert snapshot is dataset.current() and snapshot.version != version
+    assert len(snapshot.zomato_dataset) == len(zomato_dataset) + 1
+    ids = snapshot.zomato_dataset['Restaurant ID']
+    assert snapshot.zomato_dataset.loc[ids == int(rows[1].split(b',', 1)[0]), 'Price range'].tolist() == [1]
+    assert_same_counts(snapshot.counts, dataset.count_restaurants(snapshot.zomato_dataset))
+    assert new_id in set(ids.iloc[snapshot.search.search('le petit souffle')])
+    assert new_id in set(ids.iloc[snapshot.search.search('century city mall', limit=100)])
+    assert address_files and dataset.ZOMATO_FILE not in address_files
+
+    #The search index is updated with the appended rows only, and finds the same restaurants as one built from the csv file
+    built = search.SearchIndex(snapshot.zomato_dataset, read_addresses())
+    for query in ['pizz', 'le petit', 'century city', 'makati']:
+        assert list(snapshot.search.search(query)) == list(built.search(query))
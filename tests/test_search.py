@@ -0,0 +1,19 @@
+import numpy as np
+
+import dataset
+
+
+#The index memory mapped from the cache directory suggests the same restaurants as the one built from the csv file, most
+#voted first
+def test_saved_index_suggests_the_same_restaurants(tmp_path):
+    zomato_dataset = dataset.build_dataset()
+    built = dataset.load_search_index(zomato_dataset, 'test', cache_dir=str(tmp_path))
+    loaded = dataset.load_search_index(zomato_dataset, 'test', cache_dir=str(tmp_path))
+    assert isinstance(loaded._numbers, np.memmap)
+
+    for query in ['pizz', 'pizza hut c', 'new d', 'connaught place', 'zzzz q']:
+        rows = built.search(query)
+        assert list(loaded.search(query)) == list(rows)
+        votes = zomato_dataset['Votes'].to_numpy()[rows]
+        assert (np.diff(votes) <= 0).all()
+    assert 'Pizza Hut' in set(zomato_dataset['Restaurant Name'].iloc[built.search('pizza hut c')])
@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import dataset
+import spatial
+
+
+@pytest.fixture(scope='module')
+def grid():
+    return spatial.GridIndex(dataset.build_dataset())
+
+
+#The cells of the tiles covering the visible area are the cells of the whole map which fall in those tiles
+@pytest.mark.parametrize('level', spatial.GRID_LEVELS)
+@pytest.mark.parametrize('filters', [(None, None, None), ('India', None, (0, 5)), ('India', 'New Delhi', (3, 5))])
+def test_cells_of_tiles_are_the_visible_cells_of_the_whole_map(grid, level, filters):
+    tiles = spatial.tiles_for_bounds((76.8, 77.5, 28.3, 28.9), level)
+    cells = grid.cells(level, *filters)
+    x = spatial.cell_x(cells['lon'], level) // spatial.TILE_CELLS
+    y = spatial.cell_y(cells['lat'], level) // spatial.TILE_CELLS
+    visible = cells[(x >= tiles[0]) & (x <= tiles[1]) & (y >= tiles[2]) & (y <= tiles[3])]
+    assert len(visible) and np.all(visible['count'] > 0)
+    pd.testing.assert_frame_equal(grid.cells(level, *filters, tiles), visible.reset_index(drop=True))
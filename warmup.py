@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ## Prerendering the dashboard figures
+
+# There are only a few dozen countries and 21 ranges of ratings, so every figure drawn by the bar chart, grouped bar chart,
+# donut graph, world map and cost box plot callbacks can be rendered ahead of time. This module renders them in parallel
+# across a process pool and stores them in the figure cache, so that the first requests after a deploy are as fast as the
+# later ones.
+#
+# The warm up runs when the app is imported with ZOMATO_WARMUP=1 set. The figures can also be rendered at build time into a
+# file, which the app loads on start when ZOMATO_FIGURE_CACHE_FILE points to it:
+#
+#     python warmup.py figures.json
+#
+# The file has to be rendered again whenever the dataset changes. Under gunicorn, ZOMATO_WARMUP=1 renders the file once in
+# the master process (see gunicorn.conf.py), so that the workers only load it.
+
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import dataset
+from figure_cache import serialize_figure
+
+
+#The functions drawing the figures, by their names
+#They are set in the parent process before the pool is started, and by the initializer of a worker started without fork
+_builders = {}
+
+
+def _init_worker():
+    if not _builders:
+        os.environ['ZOMATO_WARMUP'] = '0'
+        import app
+        _builders.update(app.figure_builders)
+
+
+#Renders a single figure from the current snapshot in a worker and returns it as JSON, along with the version of the snapshot
+def _render(task):
+    name, args = task
+    snapshot = dataset.current()
+    return task, snapshot.version, serialize_figure(_builders[name](snapshot, *args))
+
+
+#Renders the figures for all the (function name, arguments) tasks and puts them in the figure cache
+#builders maps the function names to the undecorated functions drawing the figures. The cache is made large enough to hold
+#all of them, otherwise the last ones rendered would push the first ones out
+def prerender(builders, tasks, figure_cache, processes=None):
+    _builders.update(builders)
+    figure_cache.maxsize = max(figure_cache.maxsize, len(tasks))
+    mp_context = multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() else None
+    with ProcessPoolExecutor(max_workers=processes, mp_context=mp_context, initializer=_init_worker) as pool:
+        for (name, args), version, figure_json in pool.map(_render, tasks, chunksize=8):
+            figure_cache.put(figure_cache.key(name, args, version), figure_json)
+    return len(tasks)
+
+
+#Renders every figure into the given file
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        sys.exit("usage: python warmup.py <figures file>")
+    os.environ['ZOMATO_WARMUP'] = '0'
+    import app
+    count = prerender(app.figure_builders, app.warmup_tasks(), app.figure_cache)
+    app.figure_cache.save(sys.argv[1])
+    print("Rendered %d figures to %s" % (count, sys.argv[1]))